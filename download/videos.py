@@ -77,10 +77,8 @@ def preprocess(moma_dir: str, act_ids: set[str], resize: Optional[int] = 320):
     N = len(act_ids)
     for i, act_id in enumerate(sorted(act_ids), start=1):
         progress = f"{act_id} [{i}/{N}]\t"
-        print(f"{progress}trimming activity")
-        processor.trim_activity(act_id, resize=resize)
-        print(f"{progress}trimming sub-activities")
-        processor.trim_sub_activity(act_id, resize=resize)
+        print(f"{progress}trimming activity and sub-activities")
+        processor.trim_activity_and_sub_activities(act_id, resize=resize)
         print(f"{progress}trimming high-level interactions")
         processor.trim_hoi(act_id, resize=resize)
         print(f"{progress}generating high-level interaction frames")
@@ -1,2 +1,26 @@
+import importlib
+
 from .moma import MOMA
-from .visualizers import *
+
+# the visualizers depend on torchvision, pygraphviz, matplotlib, seaborn, scipy and
+# distinctipy, so they are only imported when first accessed
+_visualizers = {
+    "AnnVisualizer": ".visualizers.ann",
+    "OverlayVisualizer": ".visualizers.overlay",
+    "StatVisualizer": ".visualizers.stat",
+    "TimelineVisualizer": ".visualizers.timeline",
+    "get_dist_per_class": ".visualizers.utils",
+    "get_dist_overall": ".visualizers.utils",
+}
+
+
+def __getattr__(name):
+    if name in _visualizers:
+        value = getattr(importlib.import_module(_visualizers[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_visualizers))
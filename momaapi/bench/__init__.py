@@ -0,0 +1,8 @@
+"""
+Benchmarks for the MOMA API, runnable as ``python -m momaapi.bench <command>``:
+ - startup: per-phase wall time, syscalls and memory of ``MOMA(dir_moma)`` for cold
+   and warm caches
+ - synthetic: generate a synthetic dataset to benchmark against
+"""
+from .startup import profile_startup
+from .synthetic import make_synthetic
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os.path as osp
+import sys
+import tempfile
+
+from .startup import compare, format_results, profile_startup
+from .synthetic import make_synthetic
+
+
+def startup(args):
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        dir_moma = args.dir_moma
+        if dir_moma is None:
+            dir_moma = osp.join(dir_tmp, "moma")
+            make_synthetic(dir_moma, args.num_acts)
+
+        results = profile_startup(dir_moma, args.repeat)
+
+    print(format_results(results))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+def synthetic(args):
+    make_synthetic(args.dir_moma, args.num_acts, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m momaapi.bench")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_startup = subparsers.add_parser(
+        "startup", help="profile MOMA(dir_moma) with cold and warm caches"
+    )
+    parser_startup.add_argument(
+        "-d",
+        "--dir-moma",
+        type=str,
+        default=None,
+        help="dataset to profile, from a temporary copy of its annotations "
+        "(default: a temporary synthetic dataset)",
+    )
+    parser_startup.add_argument("-n", "--num-acts", type=int, default=600)
+    parser_startup.add_argument("-r", "--repeat", type=int, default=3)
+    parser_startup.add_argument(
+        "-o", "--output", type=str, default=None, help="save the results as JSON"
+    )
+    parser_startup.add_argument(
+        "-b",
+        "--baseline",
+        type=str,
+        default=None,
+        help="fail if the total startup time regresses against saved results",
+    )
+    parser_startup.add_argument("-t", "--tolerance", type=float, default=0.25)
+    parser_startup.set_defaults(func=startup)
+
+    parser_synthetic = subparsers.add_parser(
+        "synthetic", help="generate a synthetic dataset"
+    )
+    parser_synthetic.add_argument("dir_moma", type=str)
+    parser_synthetic.add_argument("-n", "--num-acts", type=int, default=600)
+    parser_synthetic.add_argument("-s", "--seed", type=int, default=0)
+    parser_synthetic.set_defaults(func=synthetic)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Startup profiler for ``MOMA(dir_moma)``. Each run happens in a fresh interpreter and
+reports, per phase, the inclusive wall time, the number of calls, the number of read
+and write syscalls (Linux only) and the change in resident memory.
+"""
+
+import contextlib
+from functools import wraps
+import json
+import os
+import os.path as osp
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# (phase, module, class, method), in the order they are reported
+phases = [
+    ("taxonomy", "momaapi.taxonomy", "Taxonomy", "__init__"),
+    ("taxonomy.compile", "momaapi.taxonomy", "Taxonomy", "_read_taxonomy"),
+    ("lookup", "momaapi.lookup", "Lookup", "__init__"),
+    ("lookup.read_anns", "momaapi.lookup", "Lookup", "_read_anns"),
+    ("lookup.load_cache", "momaapi.lookup", "Lookup", "_load_cache"),
+    ("lookup.save_cache", "momaapi.lookup", "Lookup", "_save_cache"),
+    ("lookup.splits", "momaapi.lookup", "Lookup", "_read_paradigms_and_splits"),
+    ("lazy_dict", "momaapi.data.dicts", "LazyDict", "__init__"),
+    ("bidict", "momaapi.data.dicts", "Bidict", "__init__"),
+    ("statistics", "momaapi.statistics", "Statistics", "__init__"),
+    ("statistics.compile", "momaapi.statistics", "Statistics", "_get_statistics"),
+    ("statistics.load_cache", "momaapi.statistics", "Statistics", "_load_cache"),
+]
+modes = ["cold", "warm"]
+
+
+def _sample():
+    try:
+        with open("/proc/self/io", "r") as f:
+            io = dict(line.split(": ") for line in f.read().splitlines())
+        syscalls = int(io["syscr"]) + int(io["syscw"])
+    except OSError:
+        syscalls = None
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return time.perf_counter(), syscalls, rss
+
+
+class _Probe:
+    def __init__(self):
+        self.results = {}
+        self._depth = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # recursive calls (e.g., nested Bidicts) are only counted once
+        self._depth[name] = self._depth.get(name, 0) + 1
+        if self._depth[name] > 1:
+            try:
+                yield
+            finally:
+                self._depth[name] -= 1
+            return
+
+        start = _sample()
+        try:
+            yield
+        finally:
+            end = _sample()
+            self._depth[name] -= 1
+            result = self.results.setdefault(
+                name, {"time": 0.0, "calls": 0, "syscalls": None, "rss": 0}
+            )
+            result["time"] += end[0] - start[0]
+            result["calls"] += 1
+            if start[1] is not None:
+                result["syscalls"] = (result["syscalls"] or 0) + end[1] - start[1]
+            result["rss"] += end[2] - start[2]
+
+    def instrument(self, name, cls, method):
+        attr = cls.__dict__[method]
+        is_static = isinstance(attr, staticmethod)
+        func = attr.__func__ if is_static else attr
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        setattr(cls, method, staticmethod(wrapper) if is_static else wrapper)
+
+
+def _run_once(dir_moma, time_import):
+    """
+    Construct MOMA and read its statistics once. Runs in the child process.
+    """
+    import importlib
+
+    probe = _Probe()
+    probe.results["import"] = {
+        "time": time_import,
+        "calls": 1,
+        "syscalls": None,
+        "rss": 0,
+    }
+    for name, module, cls, method in phases:
+        probe.instrument(name, getattr(importlib.import_module(module), cls), method)
+
+    from momaapi import MOMA
+
+    with probe.phase("total"):
+        with contextlib.redirect_stdout(sys.stderr):
+            moma = MOMA(dir_moma)
+            moma.statistics
+
+    print(json.dumps(probe.results))
+
+
+def _spawn(dir_moma):
+    code = (
+        "import time; t = time.perf_counter(); import momaapi; "
+        "t = time.perf_counter() - t; "
+        "from momaapi.bench.startup import _run_once; "
+        f"_run_once({dir_moma!r}, t)"
+    )
+    env = dict(os.environ)
+    dir_root = osp.dirname(osp.dirname(osp.dirname(osp.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [dir_root] + ([env["PYTHONPATH"]] if "PYTHONPATH" in env else [])
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def _aggregate(runs):
+    """
+    Median of each measurement across runs
+    """
+    results = {}
+    for name in ["import", "total"] + [phase[0] for phase in phases]:
+        results_phase = [run[name] for run in runs if name in run]
+        if len(results_phase) == 0:
+            continue
+        results[name] = {
+            key: None
+            if results_phase[0][key] is None
+            else statistics.median([x[key] for x in results_phase])
+            for key in ["time", "calls", "syscalls", "rss"]
+        }
+    return results
+
+
+def _copy_anns(dir_moma, dir_trg):
+    """
+    Copy the source annotations that MOMA reads at startup, without their caches
+    """
+    shutil.copytree(
+        osp.join(dir_moma, "anns"),
+        osp.join(dir_trg, "anns"),
+        ignore=shutil.ignore_patterns("cache"),
+    )
+    path_timestamps = osp.join(dir_moma, "videos/interaction_frames/timestamps.json")
+    if osp.exists(path_timestamps):
+        os.makedirs(osp.join(dir_trg, "videos/interaction_frames"))
+        shutil.copy(path_timestamps, osp.join(dir_trg, "videos/interaction_frames"))
+
+
+def profile_startup(dir_moma, repeat=3):
+    """
+    Profile ``MOMA(dir_moma)`` followed by reading its statistics, with cold caches
+    (``anns/cache`` removed before every run) and warm caches.
+    The runs use a temporary copy of the annotations, so the caches of the dataset
+    are left untouched. Note that cold caches still hit the OS page cache.
+
+    :param dir_moma: directory of the dataset
+    :type dir_moma: str
+    :param repeat: number of runs per mode; the median of each measurement is kept
+    :type repeat: int
+    :return: ``results[mode][phase][measurement]``
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        _copy_anns(dir_moma, dir_tmp)
+        dir_cache = osp.join(dir_tmp, "anns/cache")
+
+        runs_cold = []
+        for _ in range(repeat):
+            if osp.exists(dir_cache):
+                shutil.rmtree(dir_cache)
+            runs_cold.append(_spawn(dir_tmp))
+
+        runs_warm = [_spawn(dir_tmp) for _ in range(repeat)]
+
+    return {"cold": _aggregate(runs_cold), "warm": _aggregate(runs_warm)}
+
+
+def format_results(results):
+    lines = []
+    for mode in modes:
+        lines.append(
+            f"{mode + ' cache':<24}{'time (ms)':>12}{'calls':>8}"
+            f"{'syscalls':>10}{'rss (MB)':>10}"
+        )
+        for name, result in results[mode].items():
+            syscalls = "-" if result["syscalls"] is None else f"{result['syscalls']:.0f}"
+            lines.append(
+                f"  {name:<22}{result['time'] * 1000:>12.2f}{result['calls']:>8.0f}"
+                f"{syscalls:>10}{result['rss'] / 2**20:>10.2f}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare the total startup time against a baseline.
+
+    :return: a list of regressions, each a human-readable string
+    """
+    regressions = []
+    for mode in modes:
+        time_baseline = baseline[mode]["total"]["time"]
+        time_current = results[mode]["total"]["time"]
+        if time_current > time_baseline * (1 + tolerance):
+            regressions.append(
+                f"{mode} startup took {time_current * 1000:.2f} ms, "
+                f"baseline is {time_baseline * 1000:.2f} ms"
+            )
+    return regressions
@@ -0,0 +1,184 @@
+"""
+A synthetic MOMA-LRG dataset with the layout of the real annotations, so the API can
+be benchmarked (e.g., in CI) without downloading the dataset. Every activity,
+sub-activity and actor class appears in every split of both paradigms, so the
+sanity checks in Statistics pass.
+"""
+
+import json
+import os
+import os.path as osp
+import random
+
+num_classes_act = 6
+num_classes_sact = 3  # per activity class
+num_classes_actor = 5
+num_classes_object = 12
+num_classes_att = 3
+num_classes_rel = 6
+
+
+def _write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _make_taxonomy(dir_moma):
+    dir_taxonomy = osp.join(dir_moma, "anns/taxonomy")
+    os.makedirs(dir_taxonomy, exist_ok=True)
+
+    cnames_act = [f"act{i}" for i in range(num_classes_act)]
+    taxonomy = {
+        "actor": {"person": [f"actor{i}" for i in range(num_classes_actor)]},
+        "object": {"thing": [f"object{i}" for i in range(num_classes_object)]},
+        "attribute": {"att": [[f"att{i}", "actor"] for i in range(num_classes_att)]},
+        "relationship": {
+            "rel": [[f"rel{i}", "actor", "object"] for i in range(num_classes_rel)]
+        },
+        "act_sact": {
+            x: [f"{x}_sact{i}" for i in range(num_classes_sact)] for x in cnames_act
+        },
+        "lvis": {"object0": 1},
+        "few_shot": {
+            "train": cnames_act[:4],
+            "val": cnames_act[4:5],
+            "test": cnames_act[5:],
+        },
+    }
+    for name, data in taxonomy.items():
+        _write_json(osp.join(dir_taxonomy, f"{name}.json"), data)
+
+    return taxonomy
+
+
+def _make_hoi(rng, id_hoi, time, num_actors, num_objects):
+    actors = [
+        {
+            "id": chr(ord("A") + i),
+            "class_name": f"actor{(i + int(time)) % num_classes_actor}",
+            "bbox": [rng.randint(0, 300), rng.randint(0, 300), 50, 60],
+        }
+        for i in range(num_actors)
+        if rng.random() < 0.9
+    ]
+    if len(actors) == 0:
+        actors = [{"id": "A", "class_name": "actor0", "bbox": [1, 2, 3, 4]}]
+    objects = [
+        {
+            "id": str(i + 1),
+            "class_name": f"object{i}",
+            "bbox": [rng.randint(0, 300), rng.randint(0, 300), 30, 40],
+        }
+        for i in range(num_objects)
+        if rng.random() < 0.8
+    ]
+    atts = [
+        {
+            "class_name": f"att{rng.randrange(num_classes_att)}",
+            "source_id": actor["id"],
+        }
+        for actor in actors
+        if rng.random() < 0.5
+    ]
+    rels = [
+        {
+            "class_name": f"rel{rng.randrange(num_classes_rel)}",
+            "source_id": actor["id"],
+            "target_id": object["id"],
+        }
+        for actor in actors
+        for object in objects
+        if rng.random() < 0.5
+    ]
+
+    return {
+        "id": str(id_hoi),
+        "time": float(time),
+        "actors": actors,
+        "objects": objects,
+        "attributes": atts,
+        "relationships": rels,
+        "transitive_actions": [],
+        "intransitive_actions": [],
+    }
+
+
+def make_synthetic(dir_moma, num_acts=600, seed=0):
+    """
+    Generate a synthetic dataset under ``dir_moma``.
+
+    :param dir_moma: directory to write the annotations to
+    :type dir_moma: str
+    :param num_acts: number of activity instances, rounded up to a multiple of 24
+    :type num_acts: int
+    :param seed: random seed
+    :type seed: int
+    """
+    rng = random.Random(seed)
+    num_acts = -(-num_acts // 24) * 24  # every class in every split
+    taxonomy = _make_taxonomy(dir_moma)
+    os.makedirs(osp.join(dir_moma, "anns/splits"), exist_ok=True)
+
+    anns = []
+    id_sact, id_hoi = 0, 0
+    for i in range(num_acts):
+        cname_act = f"act{i % num_classes_act}"
+        anns_sact = []
+        time = 1.0
+        for cname_sact in taxonomy["act_sact"][cname_act]:
+            start, end = time, time + rng.randint(3, 6)
+            num_actors, num_objects = rng.randint(1, 3), rng.randint(1, 4)
+            anns_hoi = []
+            for t in range(int(start) + 1, int(end)):
+                anns_hoi.append(_make_hoi(rng, id_hoi, t, num_actors, num_objects))
+                id_hoi += 1
+            anns_sact.append(
+                {
+                    "id": str(id_sact),
+                    "class_name": cname_sact,
+                    "start_time": start,
+                    "end_time": end,
+                    "higher_order_interactions": anns_hoi,
+                }
+            )
+            id_sact += 1
+            time = end
+
+        anns.append(
+            {
+                "file_name": f"{i:06d}.mp4",
+                "num_frames": int(time * 30) + 31,
+                "width": 640,
+                "height": 480,
+                "duration": time + 1.0,
+                "activity": {
+                    "id": f"{i:06d}",
+                    "class_name": cname_act,
+                    "start_time": 0.5,
+                    "end_time": time,
+                    "sub_activities": anns_sact,
+                },
+            }
+        )
+    _write_json(osp.join(dir_moma, "anns/anns.json"), anns)
+
+    ids_act = [ann["activity"]["id"] for ann in anns]
+    splits = ["train", "train", "val", "test"]
+    _write_json(
+        osp.join(dir_moma, "anns/splits/standard.json"),
+        {
+            split: [x for i, x in enumerate(ids_act) if splits[i // 6 % 4] == split]
+            for split in ["train", "val", "test"]
+        },
+    )
+    _write_json(
+        osp.join(dir_moma, "anns/splits/few_shot.json"),
+        {
+            split: [
+                ann["activity"]["id"]
+                for ann in anns
+                if ann["activity"]["class_name"] in taxonomy["few_shot"][split]
+            ]
+            for split in ["train", "val", "test"]
+        },
+    )
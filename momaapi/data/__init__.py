@@ -1,2 +1,3 @@
 from .ann import Metadatum, Act, SAct, HOI, Clip, BBox, Entity, Predicate
 from .dicts import Bidict, OrderedBidict, LazyDict
+from .arrays import AnnArrays, GraphBatch
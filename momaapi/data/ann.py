@@ -96,10 +96,8 @@ class SAct:
         ann,
         scale_factor,
         taxonomy_sact,
-        taxonomy_actor,
-        taxonomy_object,
-        taxonomy_att,
-        taxonomy_rel,
+        num_classes_att,
+        num_classes_rel,
     ):
         self.id = ann["id"]
         self.cname = ann["class_name"]
@@ -109,20 +107,42 @@ class SAct:
         self.ids_hoi = [x["id"] for x in ann["higher_order_interactions"]]
         self.times = [x["time"] for x in ann["higher_order_interactions"]]
 
+        self._scale_factor = scale_factor
+        self._num_classes_att = num_classes_att
+        self._num_classes_rel = num_classes_rel
+        self._id_hoi_to_ann_hoi = None
+        self._aacts = None
+
+    def link(self, id_hoi_to_ann_hoi):
+        """
+        Attach the higher-order interactions of the sub-activity. Their entities and
+        predicates are grouped into atomic actions on first access of ``aacts_actor``,
+        ``aacts_object``, ``ids_actor`` or ``ids_object``, and the atomic actions
+        reference the HOI-level :class:`Entity` and :class:`Predicate` objects
+        instead of copies.
+
+        :param id_hoi_to_ann_hoi: a mapping from HOI IDs to HOI annotations
+        :type id_hoi_to_ann_hoi: Mapping[str, HOI]
+        :return: the sub-activity itself
+        :rtype: SAct
+        """
+        self._id_hoi_to_ann_hoi = id_hoi_to_ann_hoi
+        self._aacts = None
+        return self
+
+    def _get_aacts(self):
+        if self._aacts is not None:
+            return self._aacts
+
+        assert self._id_hoi_to_ann_hoi is not None, f"{self} is not linked to its HOIs"
+        anns_hoi = [self._id_hoi_to_ann_hoi[id_hoi] for id_hoi in self.ids_hoi]
+
         # find unique entity instances
         ids_actor = sorted(
-            set(
-                [y["id"] for x in ann["higher_order_interactions"] for y in x["actors"]]
-            )
+            set([actor.id for ann_hoi in anns_hoi for actor in ann_hoi.actors])
         )
         ids_object = sorted(
-            set(
-                [
-                    y["id"]
-                    for x in ann["higher_order_interactions"]
-                    for y in x["objects"]
-                ]
-            )
+            set([object.id for ann_hoi in anns_hoi for object in ann_hoi.objects])
         )
 
         # group annotations by entity ID and frame ID
@@ -142,33 +162,47 @@ class SAct:
             id_entity: [[] for _ in self.ids_hoi]
             for id_entity in ids_actor + ids_object
         }
-        for i, ann_hoi_raw in enumerate(ann["higher_order_interactions"]):
-            for x in ann_hoi_raw["actors"]:
-                assert x["id"] not in actors or actors[x["id"]][i] is None
-                actors[x["id"]][i] = Entity(x, "actor", taxonomy_actor)
-            for x in ann_hoi_raw["objects"]:
-                assert x["id"] not in objects or objects[x["id"]][i] is None
-                objects[x["id"]][i] = Entity(x, "object", taxonomy_object)
-            for x in ann_hoi_raw["attributes"]:
-                atts[x["source_id"]][i].append(Predicate(x, "att", taxonomy_att))
-            for x in ann_hoi_raw["relationships"]:
-                rels[x["source_id"]][i].append(Predicate(x, "rel", taxonomy_rel))
+        for i, ann_hoi in enumerate(anns_hoi):
+            for actor in ann_hoi.actors:
+                assert actors[actor.id][i] is None
+                actors[actor.id][i] = actor
+            for object in ann_hoi.objects:
+                assert objects[object.id][i] is None
+                objects[object.id][i] = object
+            for att in ann_hoi.atts:
+                atts[att.id_src][i].append(att)
+            for rel in ann_hoi.rels:
+                rels[rel.id_src][i].append(rel)
 
         # create aacts
         info = {
             "start_time": self.start,
             "end_time": self.end,
             "times": self.times,
-            "scale_factor": scale_factor,
-            "num_classes_att": len(taxonomy_att),
-            "num_classes_rel": len(taxonomy_rel),
+            "scale_factor": self._scale_factor,
+            "num_classes_att": self._num_classes_att,
+            "num_classes_rel": self._num_classes_rel,
         }
-        self.aacts_actor = [
-            AAct(info, actors[i], atts[i], rels[i]) for i in ids_actor
-        ]
-        self.aacts_object = [
-            AAct(info, objects[i], atts[i], rels[i]) for i in ids_object
-        ]
+        aacts_actor = [AAct(info, actors[i], atts[i], rels[i]) for i in ids_actor]
+        aacts_object = [AAct(info, objects[i], atts[i], rels[i]) for i in ids_object]
+        self._aacts = (aacts_actor, aacts_object)
+
+        return self._aacts
+
+    def __getstate__(self):
+        # entities and predicates are only cached once, with the HOIs
+        state = self.__dict__.copy()
+        state["_id_hoi_to_ann_hoi"] = None
+        state["_aacts"] = None
+        return state
+
+    @property
+    def aacts_actor(self):
+        return self._get_aacts()[0]
+
+    @property
+    def aacts_object(self):
+        return self._get_aacts()[1]
 
     @property
     def ids_actor(self):
@@ -182,6 +216,28 @@ class SAct:
     def length(self):
         return len(self.times)
 
+    def get_tracks(self, full_res=False):
+        """
+        Get the bounding box tracks of all entities in the sub-activity, actors first
+
+        :param full_res: return bounding boxes at the full resolution of the raw video
+        :type full_res: bool
+        :return: a (N, T, 4) float array of ``[x, y, w, h]`` bounding boxes, which is
+          ``nan`` where an entity is absent, a (N, T) boolean presence mask, a (N,)
+          array of entity kinds and a (N,) array of entity class IDs
+        :rtype: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        """
+        aacts = self.aacts_actor + self.aacts_object
+        tracks = [aact.get_track(full_res=full_res) for aact in aacts]
+
+        bboxes = np.array([track[0] for track in tracks], dtype=float)
+        bboxes = bboxes.reshape(-1, self.length, 4)
+        masks = np.array([track[1] for track in tracks], dtype=bool)
+        masks = masks.reshape(-1, self.length)
+        kinds = np.array([aact.kind_entity for aact in aacts], dtype=str)
+        cids = np.array([aact.cid_entity for aact in aacts], dtype=int)
+        return bboxes, masks, kinds, cids
+
     def __repr__(self):
         return f"SAct(id={self.id}, cname={self.cname}, time=[{self.start}, end={self.end}), length={self.length})"
 
@@ -218,6 +274,7 @@ class AAct:
         self._rels = rels
         self._num_classes_att = info["num_classes_att"]
         self._num_classes_rel = info["num_classes_rel"]
+        self._track = None
 
     def get_bboxes(self, full_res=False):
         bboxes = []
@@ -231,6 +288,34 @@ class AAct:
             bboxes.append(bbox)
         return bboxes
 
+    def get_track(self, full_res=False):
+        """
+        Get the bounding box track of the entity as arrays
+
+        :param full_res: return bounding boxes at the full resolution of the raw video
+        :type full_res: bool
+        :return: a (T, 4) float array of ``[x, y, w, h]`` bounding boxes, which is
+          ``nan`` where the entity is absent, and a (T,) boolean presence mask
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        if self._track is None:
+            mask = np.array([entity is not None for entity in self._entities])
+            bboxes = np.full((self.length, 4), np.nan)
+            bboxes[mask] = [
+                [entity.bbox.x, entity.bbox.y, entity.bbox.width, entity.bbox.height]
+                for entity in self._entities
+                if entity is not None
+            ]
+            self._track = (bboxes, mask)
+
+        # copies, so that callers cannot modify the cached track
+        bboxes, mask = self._track
+        if full_res:
+            bboxes = bboxes.copy()
+        else:
+            bboxes = BBox.scale_array(bboxes, self._scale_factor)
+        return bboxes, mask.copy()
+
     @property
     def cids_predicate(self):  # binary
         indices_att = np.array(
@@ -343,6 +428,13 @@ class BBox:
             )
         )
 
+    @staticmethod
+    def scale_array(bboxes: np.ndarray, scale_factor: float) -> np.ndarray:
+        """
+        Vectorized version of :meth:`scale` for an array of ``[x, y, w, h]`` bounding boxes
+        """
+        return np.round(np.asarray(bboxes, dtype=float) / scale_factor)
+
     @property
     def x1(self):
         return self.x
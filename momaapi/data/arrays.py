@@ -0,0 +1,432 @@
+import glob
+import os
+import os.path as osp
+from typing import Iterable
+
+import numpy as np
+
+
+KINDS_ENTITY = ["actor", "object"]
+KINDS_PREDICATE = ["att", "rel"]
+
+
+def save_arrays(dir_arrays, arrays):
+    os.makedirs(dir_arrays, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(osp.join(dir_arrays, f"{name}.npy"), array)
+
+
+def load_arrays(dir_arrays):
+    paths = glob.glob(osp.join(dir_arrays, "*.npy"))
+    if len(paths) == 0:
+        raise FileNotFoundError(dir_arrays)
+    return {
+        osp.basename(path)[: -len(".npy")]: np.load(path, mmap_mode="r")
+        for path in paths
+    }
+
+
+def expand_ranges(starts, counts):
+    """
+    Concatenate ``range(start, start + count)`` for every pair without a Python loop
+    """
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+
+class AnnArrays:
+    """
+    Compact columnar arrays of all annotations. Activities, sub-activities and
+    higher-order interactions are sorted by ID. Entities and predicates are stored
+    contiguously per HOI, in CSR layout: the entities of the ``i``-th HOI are the rows
+    ``ptr_entity[i]:ptr_entity[i+1]`` of the entity arrays.
+
+    :ivar ids_act: (A,) sorted activity IDs
+    :ivar cids_act: (A,) activity class IDs
+    :ivar starts_act: (A,) activity start times in seconds
+    :ivar ends_act: (A,) activity end times in seconds
+    :ivar durations_video: (A,) durations of the raw videos in seconds
+    :ivar ids_sact: (S,) sorted sub-activity IDs
+    :ivar ids_act_sact: (S,) activity IDs of the sub-activities
+    :ivar cids_sact: (S,) sub-activity class IDs
+    :ivar starts_sact: (S,) sub-activity start times in seconds
+    :ivar ends_sact: (S,) sub-activity end times in seconds
+    :ivar ids_hoi: (H,) sorted HOI IDs
+    :ivar ids_sact_hoi: (H,) sub-activity IDs of the HOIs
+    :ivar ids_act_hoi: (H,) activity IDs of the HOIs
+    :ivar times_hoi: (H,) HOI times in seconds, relative to the start of the activity video
+    :ivar scale_factors_hoi: (H,) scale factors of the raw videos
+    :ivar ptr_entity: (H+1,) entity offsets
+    :ivar ptr_predicate: (H+1,) predicate offsets
+    :ivar kinds_entity: (N,) entity kinds, indexing into ``KINDS_ENTITY``
+    :ivar ids_entity: (N,) local entity instance IDs
+    :ivar cids_entity: (N,) entity class IDs
+    :ivar bboxes_entity: (N, 4) ``[x, y, w, h]`` bounding boxes at full resolution
+    :ivar kinds_predicate: (P,) predicate kinds, indexing into ``KINDS_PREDICATE``
+    :ivar cids_predicate: (P,) predicate class IDs
+    :ivar srcs_predicate: (P,) source entity index, relative to the HOI's first entity
+    :ivar trgs_predicate: (P,) target entity index, relative to the HOI's first entity,
+      or -1 for unary predicates
+    """
+
+    names = [
+        "ids_act",
+        "cids_act",
+        "starts_act",
+        "ends_act",
+        "durations_video",
+        "ids_sact",
+        "ids_act_sact",
+        "cids_sact",
+        "starts_sact",
+        "ends_sact",
+        "ids_hoi",
+        "ids_sact_hoi",
+        "ids_act_hoi",
+        "times_hoi",
+        "scale_factors_hoi",
+        "ptr_entity",
+        "ptr_predicate",
+        "kinds_entity",
+        "ids_entity",
+        "cids_entity",
+        "bboxes_entity",
+        "kinds_predicate",
+        "cids_predicate",
+        "srcs_predicate",
+        "trgs_predicate",
+    ]
+
+    def __init__(self, arrays):
+        for name in self.names:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_anns(
+        cls,
+        metadata: Iterable,
+        anns_act: Iterable,
+        anns_sact: Iterable,
+        ids_act_sact: Iterable[str],
+        anns_hoi: Iterable,
+        ids_sact_hoi: Iterable[str],
+        ids_act_hoi: Iterable[str],
+        scale_factors_hoi: Iterable[float],
+    ):
+        id_act_to_metadatum = {metadatum.id: metadatum for metadatum in metadata}
+        anns_act = sorted(anns_act, key=lambda x: x.id)
+        anns_sact, ids_act_sact = zip(
+            *sorted(zip(anns_sact, ids_act_sact), key=lambda x: x[0].id)
+        )
+        anns_hoi = list(anns_hoi)
+        ids_sact_hoi = list(ids_sact_hoi)
+        ids_act_hoi = list(ids_act_hoi)
+        scale_factors_hoi = list(scale_factors_hoi)
+        order = sorted(range(len(anns_hoi)), key=lambda i: anns_hoi[i].id)
+
+        num_entities, num_predicates = [0], [0]
+        kinds_entity, ids_entity, cids_entity, bboxes_entity = [], [], [], []
+        kinds_predicate, cids_predicate = [], []
+        srcs_predicate, trgs_predicate = [], []
+        for i in order:
+            ann_hoi = anns_hoi[i]
+            entities = ann_hoi.actors + ann_hoi.objects
+            index = {entity.id: j for j, entity in enumerate(entities)}
+            for entity in entities:
+                kinds_entity.append(KINDS_ENTITY.index(entity.kind))
+                ids_entity.append(entity.id)
+                cids_entity.append(entity.cid)
+                bbox = entity.bbox
+                bboxes_entity.append([bbox.x, bbox.y, bbox.width, bbox.height])
+            for predicate in ann_hoi.atts + ann_hoi.rels:
+                kinds_predicate.append(KINDS_PREDICATE.index(predicate.kind))
+                cids_predicate.append(predicate.cid)
+                srcs_predicate.append(index[predicate.id_src])
+                trgs_predicate.append(
+                    -1 if predicate.id_trg is None else index[predicate.id_trg]
+                )
+            num_entities.append(len(entities))
+            num_predicates.append(len(ann_hoi.atts) + len(ann_hoi.rels))
+
+        arrays = {
+            "ids_act": np.array([x.id for x in anns_act], dtype=str),
+            "cids_act": np.array([x.cid for x in anns_act], dtype=np.int32),
+            "starts_act": np.array([x.start for x in anns_act], dtype=float),
+            "ends_act": np.array([x.end for x in anns_act], dtype=float),
+            "durations_video": np.array(
+                [id_act_to_metadatum[x.id].duration for x in anns_act], dtype=float
+            ),
+            "ids_sact": np.array([x.id for x in anns_sact], dtype=str),
+            "ids_act_sact": np.array(ids_act_sact, dtype=str),
+            "cids_sact": np.array([x.cid for x in anns_sact], dtype=np.int32),
+            "starts_sact": np.array([x.start for x in anns_sact], dtype=float),
+            "ends_sact": np.array([x.end for x in anns_sact], dtype=float),
+            "ids_hoi": np.array([anns_hoi[i].id for i in order], dtype=str),
+            "ids_sact_hoi": np.array([ids_sact_hoi[i] for i in order], dtype=str),
+            "ids_act_hoi": np.array([ids_act_hoi[i] for i in order], dtype=str),
+            "times_hoi": np.array([anns_hoi[i].time for i in order], dtype=float),
+            "scale_factors_hoi": np.array(
+                [scale_factors_hoi[i] for i in order], dtype=float
+            ),
+            "ptr_entity": np.cumsum(num_entities, dtype=np.int64),
+            "ptr_predicate": np.cumsum(num_predicates, dtype=np.int64),
+            "kinds_entity": np.array(kinds_entity, dtype=np.int8),
+            "ids_entity": np.array(ids_entity, dtype=str),
+            "cids_entity": np.array(cids_entity, dtype=np.int32),
+            "bboxes_entity": np.array(bboxes_entity, dtype=np.int32).reshape(-1, 4),
+            "kinds_predicate": np.array(kinds_predicate, dtype=np.int8),
+            "cids_predicate": np.array(cids_predicate, dtype=np.int32),
+            "srcs_predicate": np.array(srcs_predicate, dtype=np.int32),
+            "trgs_predicate": np.array(trgs_predicate, dtype=np.int32),
+        }
+        return cls(arrays)
+
+    @classmethod
+    def load(cls, dir_arrays):
+        arrays = load_arrays(dir_arrays)
+        if not set(cls.names).issubset(arrays.keys()):
+            raise FileNotFoundError(dir_arrays)
+        return cls(arrays)
+
+    def save(self, dir_arrays):
+        save_arrays(dir_arrays, {name: getattr(self, name) for name in self.names})
+
+    def get_indices(self, kind, ids):
+        """
+        Get the row indices of activity, sub-activity or HOI IDs
+
+        :param kind: one of ``'act'``, ``'sact'`` and ``'hoi'``
+        :param ids: instance IDs
+        :return: row indices into the arrays of the given kind
+        :rtype: np.ndarray
+        """
+        assert kind in ["act", "sact", "hoi"]
+        ids_sorted = getattr(self, f"ids_{kind}")
+        ids = np.asarray(ids, dtype=str)
+        indices = np.searchsorted(ids_sorted, ids)
+        indices = np.minimum(indices, len(ids_sorted) - 1)
+        is_missing = ids_sorted[indices] != ids
+        if np.any(is_missing):
+            missing = ids[is_missing][:5].tolist()
+            raise KeyError(f"{np.sum(is_missing)} {kind} IDs do not exist: {missing}")
+        return indices
+
+    def get_graphs(self, ids_hoi, num_classes_att, full_res=False):
+        indices = self.get_indices("hoi", ids_hoi)
+        num_graphs = len(indices)
+
+        # nodes
+        starts_node = self.ptr_entity[indices]
+        counts_node = self.ptr_entity[indices + 1] - starts_node
+        rows_node = expand_ranges(starts_node, counts_node)
+        ptr_node = np.concatenate(([0], np.cumsum(counts_node)))
+        batch_node = np.repeat(np.arange(num_graphs), counts_node)
+
+        bboxes_node = self.bboxes_entity[rows_node].astype(np.float32)
+        if not full_res:
+            scale_factors = self.scale_factors_hoi[indices][batch_node]
+            bboxes_node = np.round(bboxes_node / scale_factors[:, None]).astype(
+                np.float32
+            )
+
+        # predicates
+        starts_predicate = self.ptr_predicate[indices]
+        counts_predicate = self.ptr_predicate[indices + 1] - starts_predicate
+        rows_predicate = expand_ranges(starts_predicate, counts_predicate)
+        batch_predicate = np.repeat(np.arange(num_graphs), counts_predicate)
+        offsets = ptr_node[batch_predicate]
+        kinds = self.kinds_predicate[rows_predicate]
+        cids = self.cids_predicate[rows_predicate].astype(np.int64)
+        srcs = self.srcs_predicate[rows_predicate] + offsets
+        trgs = self.trgs_predicate[rows_predicate] + offsets
+
+        # unary predicates become node features
+        is_att = kinds == KINDS_PREDICATE.index("att")
+        atts_node = np.zeros((len(rows_node), num_classes_att), dtype=np.uint8)
+        atts_node[srcs[is_att], cids[is_att]] = 1
+
+        # binary predicates become edges
+        is_rel = kinds == KINDS_PREDICATE.index("rel")
+        edge_index = np.stack((srcs[is_rel], trgs[is_rel])).astype(np.int64)
+        counts_edge = np.bincount(batch_predicate[is_rel], minlength=num_graphs)
+        ptr_edge = np.concatenate(([0], np.cumsum(counts_edge)))
+
+        return GraphBatch(
+            ids_hoi=self.ids_hoi[indices].tolist(),
+            ids_node=self.ids_entity[rows_node],
+            kinds_node=self.kinds_entity[rows_node].astype(np.int64),
+            cids_node=self.cids_entity[rows_node].astype(np.int64),
+            bboxes_node=bboxes_node,
+            atts_node=atts_node,
+            edge_index=edge_index,
+            cids_edge=cids[is_rel],
+            ptr_node=ptr_node,
+            ptr_edge=ptr_edge,
+            batch_node=batch_node,
+        )
+
+    def get_table(self, kind, taxonomy, paradigm_and_split_to_ids_act):
+        """
+        Flatten the annotations into a table with one row per HOI, entity or predicate.
+        Every table has the foreign keys ``id_hoi``, ``id_sact`` and ``id_act``, and the
+        split membership of the row in each paradigm (``split_standard`` and
+        ``split_few_shot``, empty if the activity is in no split).
+
+        :param kind: one of ``'hoi'``, ``'entity'`` and ``'predicate'``
+        :param taxonomy: the dataset taxonomy, used to look up class names
+        :param paradigm_and_split_to_ids_act: the activity IDs of each ``{paradigm}_{split}``
+        :return: a structured array
+        :rtype: np.ndarray
+        """
+        assert kind in ["hoi", "entity", "predicate"]
+
+        # split membership of each HOI
+        ids_act, inverse = np.unique(self.ids_act_hoi, return_inverse=True)
+        columns = {
+            "id_hoi": self.ids_hoi,
+            "id_sact": self.ids_sact_hoi,
+            "id_act": self.ids_act_hoi,
+        }
+        for paradigm in ["standard", "few-shot"]:
+            splits = np.full(len(ids_act), "", dtype="<U5")
+            for split in ["train", "val", "test"]:
+                ids_act_split = paradigm_and_split_to_ids_act[f"{paradigm}_{split}"]
+                splits[np.isin(ids_act, ids_act_split)] = split
+            columns[f"split_{paradigm.replace('-', '_')}"] = splits[inverse]
+
+        if kind == "hoi":
+            counts_entity = np.diff(self.ptr_entity)
+            counts_predicate = np.diff(self.ptr_predicate)
+            is_actor = self.kinds_entity == KINDS_ENTITY.index("actor")
+            is_att = self.kinds_predicate == KINDS_PREDICATE.index("att")
+            batch_entity = np.repeat(np.arange(len(self)), counts_entity)
+            batch_predicate = np.repeat(np.arange(len(self)), counts_predicate)
+            num_actors = np.bincount(batch_entity[is_actor], minlength=len(self))
+            num_atts = np.bincount(batch_predicate[is_att], minlength=len(self))
+
+            columns["time"] = self.times_hoi
+            columns["num_actors"] = num_actors
+            columns["num_objects"] = counts_entity - num_actors
+            columns["num_atts"] = num_atts
+            columns["num_rels"] = counts_predicate - num_atts
+
+        elif kind == "entity":
+            batch = np.repeat(np.arange(len(self)), np.diff(self.ptr_entity))
+            columns = {name: column[batch] for name, column in columns.items()}
+            kinds = self.kinds_entity.astype(np.int64)
+            cnames = np.concatenate(
+                [np.array(taxonomy[kind], dtype=str) for kind in KINDS_ENTITY]
+            )
+            offsets = np.array([0, len(taxonomy[KINDS_ENTITY[0]])])
+
+            columns["kind"] = np.array(KINDS_ENTITY)[kinds]
+            columns["id_entity"] = self.ids_entity
+            columns["cid"] = self.cids_entity
+            columns["cname"] = cnames[offsets[kinds] + self.cids_entity]
+            for i, name in enumerate(["x", "y", "width", "height"]):
+                columns[name] = self.bboxes_entity[:, i]
+
+        else:
+            batch = np.repeat(np.arange(len(self)), np.diff(self.ptr_predicate))
+            columns = {name: column[batch] for name, column in columns.items()}
+            kinds = self.kinds_predicate.astype(np.int64)
+            cnames = np.concatenate(
+                [
+                    np.array([x[0] for x in taxonomy[kind]], dtype=str)
+                    for kind in KINDS_PREDICATE
+                ]
+            )
+            offsets = np.array([0, len(taxonomy[KINDS_PREDICATE[0]])])
+
+            # predicate sources and targets are stored relative to the HOI's entities
+            srcs = self.ptr_entity[batch] + self.srcs_predicate
+            trgs = self.ptr_entity[batch] + self.trgs_predicate
+            ids_trg = self.ids_entity[trgs]
+            ids_trg[self.trgs_predicate < 0] = ""
+
+            columns["kind"] = np.array(KINDS_PREDICATE)[kinds]
+            columns["cid"] = self.cids_predicate
+            columns["cname"] = cnames[offsets[kinds] + self.cids_predicate]
+            columns["id_src"] = self.ids_entity[srcs]
+            columns["id_trg"] = ids_trg
+
+        table = np.empty(
+            len(next(iter(columns.values()))),
+            dtype=[(name, column.dtype) for name, column in columns.items()],
+        )
+        for name, column in columns.items():
+            table[name] = column
+        return table
+
+    def __len__(self):
+        return len(self.ids_hoi)
+
+    def __repr__(self):
+        return (
+            f"AnnArrays(num_hois={len(self.ids_hoi)}, num_entities={len(self.ids_entity)}, "
+            f"num_predicates={len(self.cids_predicate)})"
+        )
+
+
+class GraphBatch:
+    """
+    A batch of higher-order interaction scene graphs, concatenated in the layout used by
+    graph neural network libraries. Nodes are entities (actors first) and edges are
+    relationships; attributes are encoded as multi-hot node features.
+
+    :ivar ids_hoi: HOI IDs of the graphs in the batch
+    :ivar ids_node: (N,) local entity instance IDs
+    :ivar kinds_node: (N,) entity kinds, 0 for actors and 1 for objects
+    :ivar cids_node: (N,) entity class IDs, within the actor or object taxonomy
+    :ivar bboxes_node: (N, 4) ``[x, y, w, h]`` bounding boxes
+    :ivar atts_node: (N, num_classes_att) multi-hot attributes
+    :ivar edge_index: (2, E) source and target node indices of relationships
+    :ivar cids_edge: (E,) relationship class IDs
+    :ivar ptr_node: (B+1,) node offsets of each graph
+    :ivar ptr_edge: (B+1,) edge offsets of each graph
+    :ivar batch_node: (N,) graph index of each node
+    """
+
+    def __init__(
+        self,
+        ids_hoi,
+        ids_node,
+        kinds_node,
+        cids_node,
+        bboxes_node,
+        atts_node,
+        edge_index,
+        cids_edge,
+        ptr_node,
+        ptr_edge,
+        batch_node,
+    ):
+        self.ids_hoi = ids_hoi
+        self.ids_node = ids_node
+        self.kinds_node = kinds_node
+        self.cids_node = cids_node
+        self.bboxes_node = bboxes_node
+        self.atts_node = atts_node
+        self.edge_index = edge_index
+        self.cids_edge = cids_edge
+        self.ptr_node = ptr_node
+        self.ptr_edge = ptr_edge
+        self.batch_node = batch_node
+
+    @property
+    def num_graphs(self):
+        return len(self.ids_hoi)
+
+    @property
+    def num_nodes(self):
+        return len(self.cids_node)
+
+    @property
+    def num_edges(self):
+        return len(self.cids_edge)
+
+    def __repr__(self):
+        return (
+            f"GraphBatch(num_graphs={self.num_graphs}, num_nodes={self.num_nodes}, "
+            f"num_edges={self.num_edges})"
+        )
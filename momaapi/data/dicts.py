@@ -27,6 +27,9 @@ class Bidict(dict):
             del self.inverse[self[key]]
         super(Bidict, self).__delitem__(key)
 
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
 
 class OrderedBidict(dict):
     """
@@ -47,11 +50,20 @@ class OrderedBidict(dict):
     def __delitem__(self, key):
         raise NotImplementedError
 
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
 
 class LazyDict(dict):
-    def __init__(self, dir_cache, prefix):
+    """
+    A read-only dictionary whose values are unpickled from one file per key on first
+    access. An optional hook is applied to each value after it is loaded.
+    """
+
+    def __init__(self, dir_cache, prefix, hook=None):
         super().__init__()
         self.buffer = {}
+        self.hook = hook
         self.dir_cache = dir_cache
         self.path_prefix = osp.join(dir_cache, f"{prefix}_")
         self._keys = [
@@ -74,8 +86,10 @@ class LazyDict(dict):
         else:
             with open(self.path_prefix + key, "rb") as f:
                 value = pickle.load(f)
-                self.buffer[key] = value
-                return value
+            if self.hook is not None:
+                value = self.hook(value)
+            self.buffer[key] = value
+            return value
 
     def __len__(self):
         return len(self._keys)
@@ -1,3 +1,4 @@
+from functools import cached_property
 import itertools
 import json
 import os
@@ -5,7 +6,9 @@ import os.path as osp
 import pickle
 import shutil
 
-from .data import Bidict, LazyDict, Metadatum, Act, SAct, HOI, Clip
+import numpy as np
+
+from .data import AnnArrays, Bidict, LazyDict, Metadatum, Act, SAct, HOI, Clip
 
 """
 The following functions are publicly available:
@@ -30,6 +33,8 @@ map_id(): maps instance IDs across the MOMA hierarchy
 map_cid(): maps activity and sub-activity class IDs between few-shot and standard paradigms
  - cid_fs -> cid_std: map_cid(split=split, cid_act=cid_fs or cid_sact=cid_fs)
  - cid_std -> cid_fs: map_cid(split=split, cid_act=cid_std or cid_sact=cid_std)
+
+map_cids(): vectorized map_cid() over an array of class IDs of a single split
 """
 
 
@@ -49,19 +54,25 @@ class Lookup:
             "id_hoi_to_clip",
             "id_sact_to_id_act",
             "id_hoi_to_id_sact",
+            "ann_arrays",
         ]
         names_lazy = ["id_sact_to_ann_sact", "id_hoi_to_ann_hoi", "id_hoi_to_clip"]
+        names_arrays = ["ann_arrays"]
         names_bidict = ["id_sact_to_id_act", "id_hoi_to_id_sact"]
-        self._read_anns(dir_moma, reset_cache, names, names_lazy, names_bidict)
+        self._read_anns(
+            dir_moma, reset_cache, names, names_lazy, names_arrays, names_bidict
+        )
         self.paradigm_and_split_to_ids_act = self._read_paradigms_and_splits(dir_moma)
 
     @staticmethod
-    def _save_cache(dir_moma, data, names, names_lazy):
+    def _save_cache(dir_moma, data, names, names_lazy, names_arrays):
         dir_lookup = osp.join(dir_moma, "anns/cache/lookup")
         os.makedirs(dir_lookup, exist_ok=True)
 
         for name in names:
-            if name in names_lazy:
+            if name in names_arrays:
+                data[name].save(osp.join(dir_lookup, name))
+            elif name in names_lazy:
                 src, trg = name.split("_to_")
                 os.makedirs(osp.join(dir_lookup, src), exist_ok=True)
                 for key, value in data[name].items():
@@ -74,12 +85,14 @@ class Lookup:
                     pickle.dump(data[name], f)
 
     @staticmethod
-    def _load_cache(dir_moma, names, names_lazy):
+    def _load_cache(dir_moma, names, names_lazy, names_arrays):
         dir_lookup = osp.join(dir_moma, "anns/cache/lookup")
 
         data = {}
         for name in names:
-            if name in names_lazy:
+            if name in names_arrays:
+                data[name] = AnnArrays.load(osp.join(dir_lookup, name))
+            elif name in names_lazy:
                 src, trg = name.split("_to_")
                 data[name] = LazyDict(osp.join(dir_lookup, src), trg)
             else:
@@ -88,13 +101,16 @@ class Lookup:
 
         return data
 
-    def _read_anns(self, dir_moma, reset_cache, names, names_lazy, names_bidict):
+    def _read_anns(
+        self, dir_moma, reset_cache, names, names_lazy, names_arrays, names_bidict
+    ):
         dir_lookup = osp.join(dir_moma, "anns/cache/lookup")
         if reset_cache and osp.exists(dir_lookup):
             shutil.rmtree(dir_lookup)
 
         try:
-            data = self._load_cache(dir_moma, names, names_lazy)
+            data = self._load_cache(dir_moma, names, names_lazy, names_arrays)
+            data["id_sact_to_ann_sact"].hook = self._link_sact
 
         except FileNotFoundError:
             print("Compiling the Lookup class...")
@@ -112,6 +128,7 @@ class Lookup:
                 info_clips = None
 
             data = {name: {} for name in names}
+            ids_sact_hoi, ids_act_hoi, scale_factors_hoi = [], [], []
             for ann_raw in anns_raw:
                 ann_act_raw = ann_raw["activity"]
                 data["id_act_to_metadatum"][ann_act_raw["id"]] = Metadatum(ann_raw)
@@ -124,15 +141,6 @@ class Lookup:
                 anns_sact_raw = ann_act_raw["sub_activities"]
 
                 for ann_sact_raw in anns_sact_raw:
-                    data["id_sact_to_ann_sact"][ann_sact_raw["id"]] = SAct(
-                        ann_sact_raw,
-                        scale_factor,
-                        self.taxonomy["sact"],
-                        self.taxonomy["actor"],
-                        self.taxonomy["object"],
-                        self.taxonomy["att"],
-                        self.taxonomy["rel"],
-                    )
                     data["id_sact_to_id_act"][ann_sact_raw["id"]] = ann_act_raw["id"]
                     anns_hoi_raw = ann_sact_raw["higher_order_interactions"]
 
@@ -144,6 +152,9 @@ class Lookup:
                             self.taxonomy["att"],
                             self.taxonomy["rel"],
                         )
+                        ids_sact_hoi.append(ann_sact_raw["id"])
+                        ids_act_hoi.append(ann_act_raw["id"])
+                        scale_factors_hoi.append(scale_factor)
                         # Currently, only clips from the test set have been generated
                         if info_clips is not None and ann_hoi_raw["id"] in info_clips:
                             data["id_hoi_to_clip"][ann_hoi_raw["id"]] = Clip(
@@ -153,13 +164,36 @@ class Lookup:
                             "id"
                         ]
 
-            self._save_cache(dir_moma, data, names, names_lazy)
+                    # the sub-activity shares entities and predicates with its HOIs
+                    data["id_sact_to_ann_sact"][ann_sact_raw["id"]] = SAct(
+                        ann_sact_raw,
+                        scale_factor,
+                        self.taxonomy["sact"],
+                        len(self.taxonomy["att"]),
+                        len(self.taxonomy["rel"]),
+                    ).link(data["id_hoi_to_ann_hoi"])
+
+            data["ann_arrays"] = AnnArrays.from_anns(
+                data["id_act_to_metadatum"].values(),
+                data["id_act_to_ann_act"].values(),
+                data["id_sact_to_ann_sact"].values(),
+                data["id_sact_to_id_act"].values(),
+                data["id_hoi_to_ann_hoi"].values(),
+                ids_sact_hoi,
+                ids_act_hoi,
+                scale_factors_hoi,
+            )
+
+            self._save_cache(dir_moma, data, names, names_lazy, names_arrays)
 
         for name in names_bidict:
             data[name] = Bidict(data[name])
         for name in names:
             setattr(self, name, data[name])
 
+    def _link_sact(self, ann_sact):
+        return ann_sact.link(self.id_hoi_to_ann_hoi)
+
     @staticmethod
     def _read_paradigms_and_splits(dir_moma):
         paradigms = ["standard", "few-shot"]
@@ -320,6 +354,31 @@ class Lookup:
 
         raise ValueError
 
+    @cached_property
+    def cid_maps(self):
+        """
+        Dense class ID remapping arrays, indexed as ``cid_maps[paradigm][kind][split]``
+        where ``paradigm`` is the paradigm being mapped to:
+         - ``cid_maps['standard'][kind][split][cid_fs] = cid_std``
+         - ``cid_maps['few-shot'][kind][split][cid_std] = cid_fs``, or -1 if the
+           class is not in the split
+        """
+        cid_maps = {"standard": {}, "few-shot": {}}
+        for kind in ["act", "sact"]:
+            cid_maps["standard"][kind] = {}
+            cid_maps["few-shot"][kind] = {}
+            for split, cnames_fs in self.taxonomy["few_shot"][kind].items():
+                cids_std = np.array(
+                    [self.taxonomy[kind].index(cname) for cname in cnames_fs],
+                    dtype=np.int64,
+                )
+                cids_fs = np.full(len(self.taxonomy[kind]), -1, dtype=np.int64)
+                cids_fs[cids_std] = np.arange(len(cids_std))
+                cid_maps["standard"][kind][split] = cids_std
+                cid_maps["few-shot"][kind][split] = cids_fs
+
+        return cid_maps
+
     def map_cid(self, paradigm, split=None, cid_act=None, cid_sact=None):
         assert sum([x is not None for x in [cid_act, cid_sact]]) == 1
         if cid_act is not None:
@@ -333,15 +392,25 @@ class Lookup:
 
         if paradigm == "standard":
             assert split is not None
-            cname = self.taxonomy["few_shot"][kind][split][cid_src]
-            cid_trg = self.taxonomy[kind].index(cname)
 
         elif paradigm == "few-shot":
             cname = self.taxonomy[kind][cid_src]
             split = self.taxonomy["few_shot"][kind].inverse[cname]
-            cid_trg = self.taxonomy["few_shot"][kind][split].index(cname)
 
         else:
             raise ValueError
 
-        return cid_trg
+        return int(self.cid_maps[paradigm][kind][split][cid_src])
+
+    def map_cids(self, paradigm, split, kind, cids_src):
+        assert kind in ["act", "sact"]
+        assert split in self.cid_maps[paradigm][kind]
+
+        # integer even if empty, and not wrapped around if negative
+        cids_src = np.asarray(cids_src, dtype=np.int64)
+        assert (cids_src >= 0).all(), f"negative class IDs: {cids_src}"
+
+        cids_trg = self.cid_maps[paradigm][kind][split][cids_src]
+        assert (cids_trg >= 0).all(), f"class IDs not in the {split} split"
+
+        return cids_trg
@@ -1,18 +1,23 @@
+from functools import cached_property
 import itertools
 import os.path as osp
+from typing import Union
+
+import numpy as np
 
 from .taxonomy import Taxonomy
 from .lookup import Lookup
 from .statistics import Statistics
 from typing_extensions import Literal
 
-from .data import Metadatum, Act, SAct, HOI, Clip
+from .data import Metadatum, Act, SAct, HOI, Clip, GraphBatch
 from .utils import assert_type
 
 
 """
 The following functions are defined:
  - get_cids(): Get the class ID of a kind ('act', 'sact', etc.) that satisfies certain conditions
+ - get_cids_masks(): Get the classes of several kinds that satisfy a vector of thresholds, as boolean masks
  - map_cids(): Map class IDs between standard class IDs and split-specific contiguous class IDs
  - get_cnames(): Given class IDs, return their class names
  - is_sact(): Check whether a certain time in an activity has a sub-activity
@@ -24,6 +29,8 @@ The following functions are defined:
  - get_anns_sact(): Given sub-activity instance IDs, return their annotations
  - get_anns_hoi(): Given higher-order interaction instance IDs, return their annotations
  - get_clip(): Given higher-order interaction instance IDs, return their clips
+ - get_graphs(): Given higher-order interaction instance IDs, return their scene graphs as a batch of arrays
+ - get_table(): Return all HOI, entity or predicate annotations as a flat table
  - get_paths(): Given instance IDs, return data paths
  - sort(): Given a list of sub-activity or higher-order interaction instance IDs, return them in sorted order
 
@@ -75,8 +82,8 @@ class MOMA:
     :param lookup: a Lookup object containing information about class IDs and class names
     :type lookup: Lookup
     :param statistics: a Statistics object that can generate dataset-level statics
-    :param num_classes: the number of classes contained in the MOMA object
-    :type num_classes: int
+    :param num_classes: the number of activity and sub-activity classes of the paradigm
+    :type num_classes: dict[str, int]
     """
 
     def __init__(
@@ -93,13 +100,19 @@ class MOMA:
         self.dir_moma = dir_moma
         self.paradigm = paradigm
 
-        self.taxonomy = Taxonomy(dir_moma)
+        self.taxonomy = Taxonomy(dir_moma, reset_cache)
         self.lookup = Lookup(dir_moma, self.taxonomy, reset_cache)
-        self.statistics = Statistics(dir_moma, self.taxonomy, self.lookup, reset_cache)
+        if reset_cache:
+            Statistics.remove_cache(dir_moma)
+
+    @cached_property
+    def statistics(self) -> Statistics:
+        # statistics are only read (or compiled) on first access
+        return Statistics(self.dir_moma, self.taxonomy, self.lookup, False)
 
     @property
-    def num_classes(self) -> int:
-        return assert_type(self.taxonomy.get_num_classes()[self.paradigm], int)
+    def num_classes(self) -> dict[str, int]:
+        return assert_type(self.taxonomy.get_num_classes()[self.paradigm], dict)
 
     def get_cids(
         self,
@@ -126,29 +139,57 @@ class MOMA:
         cids = self.statistics.get_cids(kind, threshold, self.paradigm, split)
         return cids
 
+    def get_cids_masks(
+        self,
+        kinds: list[str],
+        thresholds: list[int],
+        splits: list[str],
+    ) -> dict:
+        """
+        Vectorized version of :meth:`get_cids` for threshold sweeps. Computes which
+        classes are kept for every threshold, kind and split mode in one call.
+
+        :param kinds: the kinds of classes, each one of ``'act'``, ``'sact'``, ``'actor'``,
+          ``'object'``, ``'att'`` and ``'rel'``
+        :type kinds: list
+        :param thresholds: thresholds; a class is excluded if it has fewer instances
+        :type thresholds: Union[list, np.ndarray]
+        :param splits: the split modes, as in :meth:`get_cids`
+        :type splits: list
+        :return: a (len(thresholds), num_classes) boolean mask for each kind and split
+          mode, indexed as ``masks[kind][split]``. The class IDs for the ``i``-th
+          threshold are ``np.flatnonzero(masks[kind][split][i])``
+        :rtype: dict
+        """
+        return self.statistics.get_cids_masks(kinds, thresholds, self.paradigm, splits)
+
     def map_cids(
         self,
-        split: Literal["train", "val", "test", "either", "all", "combined"],
-        cids_act_contiguous: list[str] = None,
-        cids_act: list[str] = None,
-        cids_sact_contiguous: list[str] = None,
-        cids_sact: list[str] = None,
-    ) -> list[str]:
+        split: Literal["train", "val", "test"],
+        cids_act_contiguous: Union[list[int], np.ndarray] = None,
+        cids_act: Union[list[int], np.ndarray] = None,
+        cids_sact_contiguous: Union[list[int], np.ndarray] = None,
+        cids_sact: Union[list[int], np.ndarray] = None,
+    ) -> np.ndarray:
         """
         Map class IDs between standard class IDs and split-specific contiguous class IDs.
         **For the few-shot paradigm only**.
 
+        The mapping is a single lookup into dense remapping arrays, so whole batches of
+        labels or predictions of any shape can be remapped at once.
+
         :param split: the dataset split to use
-        :type split: Literal['train', 'val', 'test', 'either', 'all', 'combined']
-        :param cids_act_contiguous: a list of contiguous class IDs in the activity set
-        :type cids_act_contiguous: Optional[List[int]]
-        :param cids_act: a list of class IDs in the activity set
-        :type cids_act: Optional[List[int]]
-        :param cids_sact_contiguous: a list of contiguous class IDs in the sub-activity set
-        :type cids_sact_contiguous: Optional[List[int]]
-        :param cids_sact: a list of class IDs in the sub-activity set
-        :type cids_sact: Optional[List[int]]
-        :return: mapping between standard class IDs and split-specific contiguous IDs
+        :type split: Literal['train', 'val', 'test']
+        :param cids_act_contiguous: contiguous class IDs in the activity set
+        :type cids_act_contiguous: Optional[Union[List[int], numpy.ndarray]]
+        :param cids_act: class IDs in the activity set
+        :type cids_act: Optional[Union[List[int], numpy.ndarray]]
+        :param cids_sact_contiguous: contiguous class IDs in the sub-activity set
+        :type cids_sact_contiguous: Optional[Union[List[int], numpy.ndarray]]
+        :param cids_sact: class IDs in the sub-activity set
+        :type cids_sact: Optional[Union[List[int], numpy.ndarray]]
+        :return: the mapped class IDs, with the same shape as the input
+        :rtype: numpy.ndarray
         """
         assert self.paradigm == "few-shot"
         assert (
@@ -167,25 +208,15 @@ class MOMA:
         )
 
         if cids_act_contiguous is not None:
-            return [
-                self.lookup.map_cid(paradigm="standard", split=split, cid_act=x)
-                for x in cids_act_contiguous
-            ]
+            return self.lookup.map_cids("standard", split, "act", cids_act_contiguous)
         elif cids_act is not None:
-            return [
-                self.lookup.map_cid(paradigm="few-shot", split=split, cid_act=x)
-                for x in cids_act
-            ]
+            return self.lookup.map_cids("few-shot", split, "act", cids_act)
         elif cids_sact_contiguous is not None:
-            return [
-                self.lookup.map_cid(paradigm="standard", split=split, cid_sact=x)
-                for x in cids_sact_contiguous
-            ]
+            return self.lookup.map_cids(
+                "standard", split, "sact", cids_sact_contiguous
+            )
         elif cids_sact is not None:
-            return [
-                self.lookup.map_cid(paradigm="few-shot", split=split, cid_sact=x)
-                for x in cids_sact
-            ]
+            return self.lookup.map_cids("few-shot", split, "sact", cids_sact)
         else:
             raise ValueError
 
@@ -587,6 +618,50 @@ class MOMA:
             for id_hoi in ids_hoi
         ]
 
+    def get_graphs(self, ids_hoi: list[str], full_res: bool = False) -> GraphBatch:
+        """
+        Given higher-order interaction instance IDs, return their scene graphs
+        concatenated into a single batch of arrays. Entities are nodes and
+        relationships are edges; attributes are multi-hot node features.
+
+        :param ids_hoi: higher-order interaction instance IDs
+        :type ids_hoi: list
+        :param full_res: return bounding boxes at the full resolution of the raw videos
+        :type full_res: bool
+        :return: a batch of scene graphs
+        :rtype: GraphBatch
+        """
+        return self.lookup.ann_arrays.get_graphs(
+            ids_hoi, len(self.taxonomy["att"]), full_res=full_res
+        )
+
+    def get_table(
+            self,
+            kind: Literal["hoi", "entity", "predicate"],
+            as_frame: bool = False,
+    ):
+        """
+        Return the annotations of the entire dataset as a flat table with one row per
+        higher-order interaction, entity or predicate. Each row carries the IDs of its
+        HOI, sub-activity and activity, as well as its split in each paradigm.
+
+        :param kind: the kind of rows, either ``'hoi'``, ``'entity'`` or ``'predicate'``
+        :type kind: Literal['hoi', 'entity', 'predicate']
+        :param as_frame: return a pandas DataFrame instead of a NumPy structured array;
+          requires pandas
+        :type as_frame: bool
+        :return: a table of annotations
+        :rtype: Union[np.ndarray, pd.DataFrame]
+        """
+        table = self.lookup.ann_arrays.get_table(
+            kind, self.taxonomy, self.lookup.paradigm_and_split_to_ids_act
+        )
+        if as_frame:
+            import pandas as pd
+
+            table = pd.DataFrame(table)
+        return table
+
     def get_paths(
             self,
             ids_act: list = None,
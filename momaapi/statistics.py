@@ -1,88 +1,139 @@
+import hashlib
 import itertools
 import json
-import jsbeautifier
 import numpy as np
 import os
 import os.path as osp
+import shutil
+
+from .data.arrays import KINDS_ENTITY, KINDS_PREDICATE, load_arrays, save_arrays
 
 
 class Statistics(dict):
+    """
+    Statistics of the entire dataset and of each split, as
+    ``statistics[key][kind][name]``.
+
+    Class distributions (``statistics[key][kind]['distribution']``) are read-only
+    rows of memory-mapped int64 arrays rather than lists. Use ``.tolist()`` to
+    serialize or modify them, or :meth:`export` to write the statistics as JSON.
+    """
+
     def __init__(self, dir_moma, taxonomy, lookup, reset_cache):
         super().__init__()
         self._taxonomy = taxonomy
         self._lookup = lookup
+        self._dir_statistics = osp.join(dir_moma, "anns/cache/statistics")
+        self._partials = None
+        self._keys = None
+        self._distributions = None
         self.statistics = self._read_statistics(dir_moma, reset_cache)
-        self._sanity_check()
 
-    def get_cids(self, kind, threshold, paradigm, split):
+    def _get_distribution(self, kind, paradigm, split):
         assert paradigm in self._lookup.retrieve("paradigms")
         assert split in self._lookup.retrieve("splits") + ["either", "all", "combined"]
 
+        splits = list(dict.fromkeys(self._lookup.retrieve("splits")))
+        distributions = self._distributions[kind]
+
         # exclude a class if the smallest number of instances in across splits is less than the threshold
         if split == "either":
-            distribution = np.stack(
-                [
-                    self.statistics[f"{paradigm}_{_split}"][kind]["distribution"]
-                    for _split in self._lookup.retrieve("splits")
-                ]
-            )
-            distribution = np.amin(distribution, axis=0)
+            rows = [self._keys.index(f"{paradigm}_{_split}") for _split in splits]
+            distribution = np.amin(distributions[rows], axis=0)
 
         # exclude a class if the largest number of instances in across splits is less than the threshold
         elif split == "all":
-            distribution = np.stack(
-                [
-                    self.statistics[f"{paradigm}_{_split}"][kind]["distribution"]
-                    for _split in self._lookup.retrieve("splits")
-                ]
-            )
-            distribution = np.amax(distribution, axis=0)
+            rows = [self._keys.index(f"{paradigm}_{_split}") for _split in splits]
+            distribution = np.amax(distributions[rows], axis=0)
 
         # exclude a class if the number of instances in the entire dataset is less than the threshold
         elif split == "combined":
-            distribution = np.array(self.statistics["all"][kind]["distribution"])
+            distribution = distributions[self._keys.index("all")]
 
         else:
-            distribution = np.array(
-                self.statistics[f"{paradigm}_{split}"][kind]["distribution"]
-            )
+            distribution = distributions[self._keys.index(f"{paradigm}_{split}")]
 
+        return distribution
+
+    def get_cids(self, kind, threshold, paradigm, split):
+        distribution = self._get_distribution(kind, paradigm, split)
         cids = np.where(distribution >= threshold)[0].tolist()
         return cids
 
-    def _sanity_check(self):
+    def get_cids_masks(self, kinds, thresholds, paradigm, splits):
+        """
+        Threshold the class distributions of several kinds and split modes at once
+
+        :param kinds: kinds of classes, e.g. ``['act', 'actor']``
+        :param thresholds: (T,) thresholds; a class is kept if it has at least this many instances
+        :param paradigm: either ``'standard'`` or ``'few-shot'``
+        :param splits: split modes, as in :meth:`get_cids`
+        :return: a (T, num_classes) boolean mask for each kind and split mode,
+          as ``masks[kind][split]``
+        :rtype: dict[str, dict[str, np.ndarray]]
+        """
+        thresholds = np.asarray(thresholds).reshape(-1, 1)
+        masks = {
+            kind: {
+                split: self._get_distribution(kind, paradigm, split) >= thresholds
+                for split in splits
+            }
+            for kind in kinds
+        }
+        return masks
+
+    @staticmethod
+    def remove_cache(dir_moma):
+        dir_statistics = osp.join(dir_moma, "anns/cache/statistics")
+        if osp.exists(dir_statistics):
+            shutil.rmtree(dir_statistics)
+
+        # the cache used to be a single JSON file
+        path_legacy = osp.join(dir_moma, "anns/cache/statistics.json")
+        if osp.exists(path_legacy):
+            os.remove(path_legacy)
+
+    def _get_fingerprint(self):
+        """
+        Partials and distributions are indexed by the rows of the annotation arrays,
+        so they are only valid for the activities they were computed from
+        """
+        ids_act = np.ascontiguousarray(self._lookup.ann_arrays.ids_act)
+        return [len(ids_act), hashlib.sha1(ids_act.tobytes()).hexdigest()]
+
+    def _sanity_check(self, statistics):
         # standard
         assert (
-            self.statistics["all"]["act"]["num_classes"]
+            statistics["all"]["act"]["num_classes"]
             == len(self._taxonomy["act"])
-            == self.statistics["standard_train"]["act"]["num_classes"]
-            == self.statistics["standard_val"]["act"]["num_classes"]
-            == self.statistics["standard_test"]["act"]["num_classes"]
+            == statistics["standard_train"]["act"]["num_classes"]
+            == statistics["standard_val"]["act"]["num_classes"]
+            == statistics["standard_test"]["act"]["num_classes"]
         )
         assert (
-            self.statistics["all"]["sact"]["num_classes"]
+            statistics["all"]["sact"]["num_classes"]
             == len(self._taxonomy["sact"])
-            == self.statistics["standard_train"]["sact"]["num_classes"]
-            == self.statistics["standard_val"]["sact"]["num_classes"]
-            == self.statistics["standard_test"]["sact"]["num_classes"]
+            == statistics["standard_train"]["sact"]["num_classes"]
+            == statistics["standard_val"]["sact"]["num_classes"]
+            == statistics["standard_test"]["sact"]["num_classes"]
         )
         assert (
-            self.statistics["all"]["actor"]["num_classes"]
+            statistics["all"]["actor"]["num_classes"]
             == len(self._taxonomy["actor"])
-            == self.statistics["standard_train"]["actor"]["num_classes"]
-            == self.statistics["standard_val"]["actor"]["num_classes"]
-            == self.statistics["standard_test"]["actor"]["num_classes"]
+            == statistics["standard_train"]["actor"]["num_classes"]
+            == statistics["standard_val"]["actor"]["num_classes"]
+            == statistics["standard_test"]["actor"]["num_classes"]
         )
         # TODO: fix object taxonomy
-        # assert self.statistics['all']['object']['num_classes'] == len(self._taxonomy['object']) == \
-        #        self.statistics['standard_train']['object']['num_classes'] == \
-        #        self.statistics['standard_val']['object']['num_classes'] == \
-        #        self.statistics['standard_test']['object']['num_classes']
+        # assert statistics['all']['object']['num_classes'] == len(self._taxonomy['object']) == \
+        #        statistics['standard_train']['object']['num_classes'] == \
+        #        statistics['standard_val']['object']['num_classes'] == \
+        #        statistics['standard_test']['object']['num_classes']
 
         # few-shot
-        assert self.statistics["few-shot_train"]["act"][
+        assert statistics["few-shot_train"]["act"][
             "num_classes"
-        ] + self.statistics["few-shot_val"]["act"]["num_classes"] + self.statistics[
+        ] + statistics["few-shot_val"]["act"]["num_classes"] + statistics[
             "few-shot_test"
         ][
             "act"
@@ -91,9 +142,9 @@ class Statistics(dict):
         ] == len(
             self._taxonomy["act"]
         )
-        assert self.statistics["few-shot_train"]["sact"][
+        assert statistics["few-shot_train"]["sact"][
             "num_classes"
-        ] + self.statistics["few-shot_val"]["sact"]["num_classes"] + self.statistics[
+        ] + statistics["few-shot_val"]["sact"]["num_classes"] + statistics[
             "few-shot_test"
         ][
             "sact"
@@ -103,204 +154,312 @@ class Statistics(dict):
             self._taxonomy["sact"]
         )
 
-    def _save_cache(self, path_statistics, statistics):
-        with open(path_statistics, "w") as f:
-            options = jsbeautifier.default_options()
-            options.indent_size = 4
-            f.write(jsbeautifier.beautify(json.dumps(statistics), options))
+    def _save_cache(self, dir_statistics, statistics):
+        """
+        Class distributions are stacked across keys into one ``.npy`` file per kind,
+        while the remaining scalar statistics are stored as compact JSON
+        """
+        os.makedirs(dir_statistics, exist_ok=True)
+
+        keys = list(statistics.keys())
+        kinds = [kind for kind, x in statistics[keys[0]].items() if "distribution" in x]
+        save_arrays(
+            dir_statistics,
+            {
+                f"distribution_{kind}": np.array(
+                    [statistics[key][kind]["distribution"] for key in keys],
+                    dtype=np.int64,
+                )
+                for kind in kinds
+            },
+        )
+
+        dir_partials = osp.join(dir_statistics, "partials")
+        save_arrays(dir_partials, self._get_partials())
+        with open(osp.join(dir_partials, "fingerprint.json"), "w") as f:
+            json.dump(self._get_fingerprint(), f)
+
+        # written last, since its existence marks a complete cache
+        scalars = {
+            key: {
+                kind: {
+                    name: value
+                    for name, value in statistics[key][kind].items()
+                    if name != "distribution"
+                }
+                for kind in statistics[key]
+            }
+            for key in keys
+        }
+        with open(osp.join(dir_statistics, "statistics.json"), "w") as f:
+            json.dump(
+                {
+                    "fingerprint": self._get_fingerprint(),
+                    "keys": keys,
+                    "statistics": scalars,
+                },
+                f,
+            )
 
-    def _load_cache(self, path_statistics):
-        with open(path_statistics, "r") as f:
-            statistics = json.load(f)
+    def _load_cache(self, dir_statistics):
+        with open(osp.join(dir_statistics, "statistics.json"), "r") as f:
+            cache = json.load(f)
+        distributions = load_arrays(dir_statistics)
+
+        # distributions are rows of the memory-mapped arrays
+        keys, statistics = cache["keys"], cache["statistics"]
+        for name, distribution in distributions.items():
+            kind = name[len("distribution_") :]
+            for i, key in enumerate(keys):
+                statistics[key][kind]["distribution"] = distribution[i]
+
+        self._keys = keys
+        self._distributions = {
+            name[len("distribution_") :]: distribution
+            for name, distribution in distributions.items()
+        }
         return statistics
 
-    def _read_statistics(self, dir_moma, reset_cache):
-        paradigms = self._lookup.retrieve("paradigms")
-        splits = self._lookup.retrieve("splits")
+    def export(self, path):
+        """
+        Export the statistics as human-readable JSON; requires jsbeautifier
 
-        path_statistics = osp.join(dir_moma, "anns/cache/statistics.json")
-        if reset_cache and osp.exists(path_statistics):
-            os.remove(path_statistics)
+        :param path: path of the JSON file
+        :type path: str
+        """
+        import jsbeautifier
 
-        if osp.exists(path_statistics):
-            statistics = self._load_cache(path_statistics)
+        statistics = {
+            key: {
+                kind: {
+                    name: value.tolist() if isinstance(value, np.ndarray) else value
+                    for name, value in self.statistics[key][kind].items()
+                }
+                for kind in self.statistics[key]
+            }
+            for key in self.statistics
+        }
+        with open(path, "w") as f:
+            options = jsbeautifier.default_options()
+            options.indent_size = 4
+            f.write(jsbeautifier.beautify(json.dumps(statistics), options))
 
-        else:
+    def _read_statistics(self, dir_moma, reset_cache):
+        if reset_cache:
+            self.remove_cache(dir_moma)
+
+        # superseded by the cache directory
+        path_legacy = osp.join(dir_moma, "anns/cache/statistics.json")
+        if osp.exists(path_legacy):
+            os.remove(path_legacy)
+
+        path_cache = osp.join(self._dir_statistics, "statistics.json")
+        if osp.exists(path_cache):
+            with open(path_cache, "r") as f:
+                fingerprint = json.load(f).get("fingerprint")
+            if fingerprint != self._get_fingerprint():
+                print("The annotations have changed since the statistics were cached")
+                shutil.rmtree(self._dir_statistics)
+
+        if not osp.exists(path_cache):
             print("Compiling the Statistics class...")
-            statistics = {"all": self._get_statistics()}
-            for paradigm, split in itertools.product(paradigms, splits):
-                statistics[f"{paradigm}_{split}"] = self._get_statistics(
-                    paradigm, split
-                )
-            self._save_cache(path_statistics, statistics)
-
-        return statistics
-
-    @staticmethod
-    def _get_duration(anns):
-        duration_total = sum(ann.end - ann.start for ann in anns)
-        duration_avg = duration_total / len(anns)
-        duration_min = min(ann.end - ann.start for ann in anns)
-        duration_max = max(ann.end - ann.start for ann in anns)
-        return duration_total, duration_avg, duration_min, duration_max
-
-    def _get_statistics(self, paradigm=None, split=None):
-        # subsample metadata, anns_act, anns_sact, and anns_hoi
-        if paradigm is None and split is None:
-            metadata = self._lookup.retrieve("metadata")
-            anns_act = self._lookup.retrieve("anns_act")
-            anns_sact = self._lookup.retrieve("anns_sact")
-            anns_hoi = self._lookup.retrieve("anns_hoi")
-        else:
-            assert paradigm is not None and split is not None
-            ids_act = self._lookup.retrieve("ids_act", f"{paradigm}_{split}")
-            metadata = [
-                self._lookup.retrieve("metadatum", id_act) for id_act in ids_act
-            ]
-            anns_act = [self._lookup.retrieve("ann_act", id_act) for id_act in ids_act]
-            ids_sact = list(
-                itertools.chain(
-                    *[
-                        self._lookup.map_id("ids_sact", id_act=id_act)
-                        for id_act in ids_act
-                    ]
-                )
-            )
-            anns_sact = [
-                self._lookup.retrieve("ann_sact", id_sact) for id_sact in ids_sact
-            ]
-            ids_hoi = list(
-                itertools.chain(
-                    *[
-                        self._lookup.map_id("ids_hoi", id_sact=id_sact)
-                        for id_sact in ids_sact
-                    ]
-                )
-            )
-            anns_hoi = [self._lookup.retrieve("ann_hoi", id_hoi) for id_hoi in ids_hoi]
-
-        # number of classes and instances
-        num_acts = len(anns_act)
-        num_classes_act = len(set([ann_act.cid for ann_act in anns_act]))
-        num_sacts = len(anns_sact)
-        num_classes_sact = len(set([ann_sact.cid for ann_sact in anns_sact]))
-        num_hois = len(anns_hoi)
-
-        num_actors_image = sum([len(ann_hoi.actors) for ann_hoi in anns_hoi])
-        num_actors_video = sum([len(ann_sact.ids_actor) for ann_sact in anns_sact])
-        num_classes_actor = len(
-            set([actor.cid for ann_hoi in anns_hoi for actor in ann_hoi.actors])
-        )
-        num_objects_image = sum([len(ann_hoi.objects) for ann_hoi in anns_hoi])
-        num_objects_video = sum([len(ann_sact.ids_object) for ann_sact in anns_sact])
-        num_classes_object = len(
-            set([object.cid for ann_hoi in anns_hoi for object in ann_hoi.objects])
+            statistics = self._get_statistics()
+            self._sanity_check(statistics)
+            self._save_cache(self._dir_statistics, statistics)
+
+        return self._load_cache(self._dir_statistics)
+
+    def _get_partials(self):
+        """
+        Compute per-activity partial statistics, from which the statistics of any set
+        of activities are obtained by summing rows
+        """
+        if self._partials is not None:
+            return self._partials
+
+        dir_partials = osp.join(self._dir_statistics, "partials")
+        try:
+            with open(osp.join(dir_partials, "fingerprint.json"), "r") as f:
+                fingerprint = json.load(f)
+            if fingerprint == self._get_fingerprint():
+                self._partials = load_arrays(dir_partials)
+                return self._partials
+        except FileNotFoundError:
+            pass
+
+        arrays = self._lookup.ann_arrays
+        num_acts = len(arrays.ids_act)
+
+        # activity index of every sub-activity, HOI, entity and predicate
+        indices_act_sact = np.searchsorted(arrays.ids_act, arrays.ids_act_sact)
+        indices_act_hoi = np.searchsorted(arrays.ids_act, arrays.ids_act_hoi)
+        indices_act_entity = np.repeat(indices_act_hoi, np.diff(arrays.ptr_entity))
+        indices_act_predicate = np.repeat(
+            indices_act_hoi, np.diff(arrays.ptr_predicate)
         )
 
-        num_atts = sum([len(ann_hoi.atts) for ann_hoi in anns_hoi])
-        num_classes_att = len(
-            set([att.cid for ann_hoi in anns_hoi for att in ann_hoi.atts])
+        # class IDs of each kind, with the activity index of each instance
+        is_actor = arrays.kinds_entity == KINDS_ENTITY.index("actor")
+        is_att = arrays.kinds_predicate == KINDS_PREDICATE.index("att")
+        cids = {
+            "act": (arrays.cids_act, np.arange(num_acts)),
+            "sact": (arrays.cids_sact, indices_act_sact),
+            "actor": (arrays.cids_entity[is_actor], indices_act_entity[is_actor]),
+            "object": (arrays.cids_entity[~is_actor], indices_act_entity[~is_actor]),
+            "att": (arrays.cids_predicate[is_att], indices_act_predicate[is_att]),
+            "rel": (arrays.cids_predicate[~is_att], indices_act_predicate[~is_att]),
+        }
+
+        # unique entity instances within each sub-activity
+        _, indices_sact_hoi = np.unique(arrays.ids_sact_hoi, return_inverse=True)
+        _, indices_id_entity = np.unique(arrays.ids_entity, return_inverse=True)
+        indices_sact_entity = np.repeat(indices_sact_hoi, np.diff(arrays.ptr_entity))
+        keys_entity = (
+            indices_sact_entity * (indices_id_entity.max(initial=0) + 1)
+            + indices_id_entity
+        ) * 2 + arrays.kinds_entity
+        _, indices_unique = np.unique(keys_entity, return_index=True)
+        indices_act_video = indices_act_entity[indices_unique]
+        is_actor_video = is_actor[indices_unique]
+
+        partials = {}
+        for kind, (cids_kind, indices_act_kind) in cids.items():
+            num_classes = len(self._taxonomy[kind])
+            partials[f"distribution_{kind}"] = np.bincount(
+                indices_act_kind * num_classes + cids_kind,
+                minlength=num_acts * num_classes,
+            ).reshape(num_acts, num_classes)
+        partials["num_hois"] = np.bincount(indices_act_hoi, minlength=num_acts)
+        partials["num_actors_video"] = np.bincount(
+            indices_act_video[is_actor_video], minlength=num_acts
         )
-        num_rels = sum([len(ann_hoi.rels) for ann_hoi in anns_hoi])
-        num_classes_rel = len(
-            set([rel.cid for ann_hoi in anns_hoi for rel in ann_hoi.rels])
+        partials["num_objects_video"] = np.bincount(
+            indices_act_video[~is_actor_video], minlength=num_acts
         )
 
         # durations
-        duration_total_raw = sum(metadatum.duration for metadatum in metadata)
-        (
-            duration_total_act,
-            duration_avg_act,
-            duration_min_act,
-            duration_max_act,
-        ) = self._get_duration(anns_act)
-        (
-            duration_total_sact,
-            duration_avg_sact,
-            duration_min_sact,
-            duration_max_sact,
-        ) = self._get_duration(anns_sact)
+        durations_sact = arrays.ends_sact - arrays.starts_sact
+        partials["duration_raw"] = np.asarray(arrays.durations_video)
+        partials["duration_act"] = arrays.ends_act - arrays.starts_act
+        partials["duration_total_sact"] = np.bincount(
+            indices_act_sact, weights=durations_sact, minlength=num_acts
+        )
+        partials["duration_min_sact"] = np.full(num_acts, np.inf)
+        np.minimum.at(partials["duration_min_sact"], indices_act_sact, durations_sact)
+        partials["duration_max_sact"] = np.full(num_acts, -np.inf)
+        np.maximum.at(partials["duration_max_sact"], indices_act_sact, durations_sact)
+
+        self._partials = partials
+        return partials
+
+    def compute(self, ids_act=None):
+        """
+        Compute the statistics of an arbitrary set of activity instances, such as a
+        filtered split, the activities of one class or a data shard. The result has
+        the same layout as the precomputed statistics, e.g. ``statistics['all']``.
+
+        :param ids_act: activity instance IDs; defaults to the entire dataset
+        :type ids_act: Optional[list[str]]
+        :return: statistics of the given activities and their annotations
+        :rtype: dict
+        """
+        partials = self._get_partials()
+        if ids_act is None:
+            indices = np.arange(len(self._lookup.ann_arrays.ids_act))
+        else:
+            indices = np.unique(self._lookup.ann_arrays.get_indices("act", ids_act))
+        partials = {name: partial[indices] for name, partial in partials.items()}
 
         # class distributions
-        bincount_act = np.bincount(
-            [ann_act.cid for ann_act in anns_act], minlength=len(self._taxonomy["act"])
-        ).tolist()
-        bincount_sact = np.bincount(
-            [ann_sact.cid for ann_sact in anns_sact],
-            minlength=len(self._taxonomy["sact"]),
-        ).tolist()
-        (
-            bincount_actor,
-            bincount_object,
-            bincount_att,
-            bincount_rel,
-        ) = ([], [], [], [])
-        for ann_hoi in anns_hoi:
-            bincount_actor += [actor.cid for actor in ann_hoi.actors]
-            bincount_object += [object.cid for object in ann_hoi.objects]
-            bincount_att += [att.cid for att in ann_hoi.atts]
-            bincount_rel += [rel.cid for rel in ann_hoi.rels]
-        bincount_actor = np.bincount(
-            bincount_actor, minlength=len(self._taxonomy["actor"])
-        ).tolist()
-        bincount_object = np.bincount(
-            bincount_object, minlength=len(self._taxonomy["object"])
-        ).tolist()
-        bincount_att = np.bincount(
-            bincount_att, minlength=len(self._taxonomy["att"])
-        ).tolist()
-        bincount_rel = np.bincount(
-            bincount_rel, minlength=len(self._taxonomy["rel"])
-        ).tolist()
-
-        # curate statistics
+        kinds = ["act", "sact", "actor", "object", "att", "rel"]
+        distributions = {
+            kind: partials[f"distribution_{kind}"].sum(axis=0) for kind in kinds
+        }
+        nums_classes = {
+            kind: int(np.count_nonzero(distribution))
+            for kind, distribution in distributions.items()
+        }
+        nums_instances = {
+            kind: int(distribution.sum())
+            for kind, distribution in distributions.items()
+        }
+
+        # durations, which are undefined for an empty set of instances
+        num_acts, num_sacts = nums_instances["act"], nums_instances["sact"]
+        duration_total_act = float(partials["duration_act"].sum())
+        duration_total_sact = float(partials["duration_total_sact"].sum())
+        if num_acts > 0:
+            duration_avg_act = duration_total_act / num_acts
+            duration_min_act = float(partials["duration_act"].min())
+            duration_max_act = float(partials["duration_act"].max())
+        else:
+            duration_avg_act = duration_min_act = duration_max_act = np.nan
+        if num_sacts > 0:
+            duration_avg_sact = duration_total_sact / num_sacts
+            duration_min_sact = float(partials["duration_min_sact"].min())
+            duration_max_sact = float(partials["duration_max_sact"].max())
+        else:
+            duration_avg_sact = duration_min_sact = duration_max_sact = np.nan
+
         statistics = {
-            "raw": {"duration_total": duration_total_raw},
+            "raw": {"duration_total": float(partials["duration_raw"].sum())},
             "act": {
                 "num_instances": num_acts,
-                "num_classes": num_classes_act,
+                "num_classes": nums_classes["act"],
                 "duration_avg": duration_avg_act,
                 "duration_min": duration_min_act,
                 "duration_max": duration_max_act,
                 "duration_total": duration_total_act,
-                "distribution": bincount_act,
+                "distribution": distributions["act"].tolist(),
             },
             "sact": {
                 "num_instances": num_sacts,
-                "num_classes": num_classes_sact,
+                "num_classes": nums_classes["sact"],
                 "duration_avg": duration_avg_sact,
                 "duration_min": duration_min_sact,
                 "duration_max": duration_max_sact,
                 "duration_total": duration_total_sact,
-                "distribution": bincount_sact,
+                "distribution": distributions["sact"].tolist(),
             },
-            "hoi": {"num_instances": num_hois,},
+            "hoi": {"num_instances": int(partials["num_hois"].sum())},
             "actor": {
-                "num_instances_image": num_actors_image,
-                "num_instances_video": num_actors_video,
-                "num_classes": num_classes_actor,
-                "distribution": bincount_actor,
+                "num_instances_image": nums_instances["actor"],
+                "num_instances_video": int(partials["num_actors_video"].sum()),
+                "num_classes": nums_classes["actor"],
+                "distribution": distributions["actor"].tolist(),
             },
             "object": {
-                "num_instances_image": num_objects_image,
-                "num_instances_video": num_objects_video,
-                "num_classes": num_classes_object,
-                "distribution": bincount_object,
+                "num_instances_image": nums_instances["object"],
+                "num_instances_video": int(partials["num_objects_video"].sum()),
+                "num_classes": nums_classes["object"],
+                "distribution": distributions["object"].tolist(),
             },
             "att": {
-                "num_instances": num_atts,
-                "num_classes": num_classes_att,
-                "distribution": bincount_att,
+                "num_instances": nums_instances["att"],
+                "num_classes": nums_classes["att"],
+                "distribution": distributions["att"].tolist(),
             },
             "rel": {
-                "num_instances": num_rels,
-                "num_classes": num_classes_rel,
-                "distribution": bincount_rel,
+                "num_instances": nums_instances["rel"],
+                "num_classes": nums_classes["rel"],
+                "distribution": distributions["rel"].tolist(),
             },
         }
 
         return statistics
 
+    def _get_statistics(self):
+        paradigms = list(dict.fromkeys(self._lookup.retrieve("paradigms")))
+        splits = list(dict.fromkeys(self._lookup.retrieve("splits")))
+
+        statistics = {"all": self.compute()}
+        for paradigm, split in itertools.product(paradigms, splits):
+            statistics[f"{paradigm}_{split}"] = self.compute(
+                self._lookup.retrieve("ids_act", f"{paradigm}_{split}")
+            )
+
+        return statistics
+
     def keys(self):
         return self.statistics.keys()
 
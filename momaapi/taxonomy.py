@@ -1,6 +1,9 @@
 import itertools
 import json
+import os
 import os.path as osp
+import pickle
+import shutil
 
 from .data import Bidict, OrderedBidict
 
@@ -21,9 +24,57 @@ class Taxonomy(dict):
 
     """
 
-    def __init__(self, dir_moma):
+    keys_lazy = ["few_shot", "lvis"]
+
+    # source files of each compiled part of the taxonomy
+    fnames = {
+        "taxonomy": [
+            "actor.json",
+            "object.json",
+            "attribute.json",
+            "relationship.json",
+            "act_sact.json",
+        ],
+        "few_shot": ["act_sact.json", "few_shot.json"],
+        "lvis": ["lvis.json"],
+    }
+
+    def __init__(self, dir_moma, reset_cache=False):
         super().__init__()
-        self.taxonomy = self._read_taxonomy(dir_moma)
+        self.dir_moma = dir_moma
+        self.dir_cache = osp.join(dir_moma, "anns/cache/taxonomy")
+        if reset_cache and osp.exists(self.dir_cache):
+            shutil.rmtree(self.dir_cache)
+
+        self.taxonomy = self._read_cached("taxonomy", self._read_taxonomy)
+
+    def _get_fingerprint(self, name):
+        fingerprint = []
+        for fname in self.fnames[name]:
+            stat = os.stat(osp.join(self.dir_moma, "anns/taxonomy", fname))
+            fingerprint.append((fname, stat.st_size, stat.st_mtime_ns))
+        return fingerprint
+
+    def _read_cached(self, name, read, *args):
+        """
+        Read a compiled part of the taxonomy from the cache, or compile it with
+        ``read`` if its source files have changed since it was cached
+        """
+        fingerprint = self._get_fingerprint(name)
+        path_cache = osp.join(self.dir_cache, name)
+
+        if osp.exists(path_cache):
+            with open(path_cache, "rb") as f:
+                cache = pickle.load(f)
+            if cache["fingerprint"] == fingerprint:
+                return cache["data"]
+
+        data = read(self.dir_moma, *args)
+        os.makedirs(self.dir_cache, exist_ok=True)
+        with open(path_cache, "wb") as f:
+            pickle.dump({"fingerprint": fingerprint, "data": data}, f)
+
+        return data
 
     @staticmethod
     def _read_taxonomy(dir_moma):
@@ -50,8 +101,27 @@ class Taxonomy(dict):
                     for cname_sact in cnames_sact
                 }
             )
+
+        taxonomy = {
+            "actor": taxonomy_actor,
+            "object": taxonomy_object,
+            "att": taxonomy_att,
+            "rel": taxonomy_rel,
+            "act": taxonomy_act,
+            "sact": taxonomy_sact,
+            "sact_to_act": taxonomy_sact_to_act,
+        }
+
+        return taxonomy
+
+    @staticmethod
+    def _read_lvis(dir_moma):
         with open(osp.join(dir_moma, "anns/taxonomy/lvis.json"), "r") as f:
             lvis = json.load(f)
+        return lvis
+
+    @staticmethod
+    def _read_few_shot(dir_moma, taxonomy_sact_to_act):
         with open(osp.join(dir_moma, "anns/taxonomy/few_shot.json"), "r") as f:
             taxonomy_fs = json.load(f)
             taxonomy_act_train = sorted(taxonomy_fs["train"])
@@ -90,41 +160,44 @@ class Taxonomy(dict):
             ),
         }
 
-        taxonomy = {
-            "actor": taxonomy_actor,
-            "object": taxonomy_object,
-            "att": taxonomy_att,
-            "rel": taxonomy_rel,
-            "act": taxonomy_act,
-            "sact": taxonomy_sact,
-            "sact_to_act": taxonomy_sact_to_act,
-            "few_shot": taxonomy_fs,
-            "lvis": lvis,
-        }
+        return taxonomy_fs
 
-        return taxonomy
+    def _read_lazy(self, key):
+        # less-used parts of the taxonomy are only read on first access
+        if key == "lvis":
+            self.taxonomy[key] = self._read_cached("lvis", self._read_lvis)
+        elif key == "few_shot":
+            self.taxonomy[key] = self._read_cached(
+                "few_shot", self._read_few_shot, self.taxonomy["sact_to_act"]
+            )
+        else:
+            raise KeyError(key)
 
     def get_num_classes(self):
         kinds = ["act", "sact"]
         splits = ["train", "val", "test"]
 
         output = {}
-        output["standard"] = {kind: len(self.taxonomy[kind]) for kind in kinds}
+        output["standard"] = {kind: len(self[kind]) for kind in kinds}
         output["few-shot"] = {
-            f"{kind}_{split}": len(self.taxonomy["few_shot"][kind][split])
+            f"{kind}_{split}": len(self["few_shot"][kind][split])
             for kind, split in itertools.product(kinds, splits)
         }
 
         return output
 
     def keys(self):
-        return self.taxonomy.keys()
+        return list(self.taxonomy.keys()) + [
+            key for key in self.keys_lazy if key not in self.taxonomy
+        ]
 
     def __getitem__(self, key):
+        if key not in self.taxonomy:
+            self._read_lazy(key)
         return self.taxonomy[key]
 
     def __len__(self):
-        return len(self.taxonomy.keys())
+        return len(self.keys())
 
     def __repr__(self):
-        return repr(self.taxonomy)
+        return repr({key: self[key] for key in self.keys()})
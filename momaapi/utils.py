@@ -34,6 +34,7 @@ def timeit(f):
 
 
 def supress_stdout(func):
+    @wraps(func)
     def wrapper(*a, **ka):
         with open(os.devnull, "w") as devnull:
             with contextlib.redirect_stdout(devnull):
@@ -1,4 +1,5 @@
 from .ann import AnnVisualizer
+from .overlay import OverlayVisualizer
 from .stat import StatVisualizer
 from .timeline import TimelineVisualizer
 from .utils import *
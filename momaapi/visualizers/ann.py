@@ -1,28 +1,101 @@
 from collections import defaultdict
-import glob
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import hashlib
+import io
+import json
 import math
 import os
 import os.path as osp
-import shutil
 import tempfile
+import threading
 from typing import Optional
 
 from distinctipy import distinctipy
 from matplotlib import font_manager
+import numpy as np
 import PIL.Image as Image
+import PIL.ImageColor as ImageColor
 import PIL.ImageDraw as ImageDraw
 import PIL.ImageFont as ImageFont
 import pygraphviz as pgv
-from torchvision import io
+from torchvision.io import read_image
 
 from ..moma import MOMA
 from ..data import BBox, HOI
 from ..utils import assert_type, only, supress_stdout
 from .timeline import TimelineVisualizer
+from .writers import write_frames
+
+# graphviz is not thread-safe
+_lock_graphviz = threading.Lock()
+
+# the visualizer of a worker process in AnnVisualizer.render_hois()
+_visualizer = None
+
+# part of the hash of every render; bump it when the output of rendering changes
+version_render = 2
+
+# graphviz attributes that affect the layout, and the ones that store it
+attrs_layout_node = ["label", "xlabel", "shape", "fontsize", "width", "height"]
+attrs_layout_edge = ["label", "fontsize", "len", "weight"]
+attrs_pos_node = ["pos", "xlp", "width", "height"]
+attrs_pos_edge = ["pos", "lp", "xlp", "head_lp", "tail_lp"]
+
+# colors of the nodes and edges of sub-activity graphs (steelblue, salmon3, grey and
+# slategray in graphviz)
+colors_graph = ["#4682b4", "#cd7054", "#bebebe", "#708090"]
+
+
+def _init_worker(dir_moma, paradigm, vis_dir, layout_dir):
+    global _visualizer
+    _visualizer = AnnVisualizer(MOMA(dir_moma, paradigm), vis_dir, layout_dir)
+
+
+@supress_stdout
+def _render_hoi(id_hoi, vstack):
+    return _visualizer._render_hoi(id_hoi, vstack)
+
+
+def _to_builtin(x):
+    """
+    Convert an annotation to JSON-serializable builtins. Objects are converted to
+    their public attributes.
+    """
+    if x is None or isinstance(x, (str, int, float, bool)):
+        return x
+    elif isinstance(x, np.ndarray):
+        return x.tolist()
+    elif isinstance(x, np.generic):
+        return x.item()
+    elif isinstance(x, (list, tuple)):
+        return [_to_builtin(y) for y in x]
+    elif isinstance(x, dict):
+        return {str(k): _to_builtin(v) for k, v in x.items()}
+    else:
+        return {
+            "__class__": type(x).__name__,
+            **{k: _to_builtin(v) for k, v in vars(x).items() if not k.startswith("_")},
+        }
 
 
 class AnnVisualizer:
-    def __init__(self, moma: MOMA, vis_dir: Optional[str] = None):
+    def __init__(
+        self,
+        moma: MOMA,
+        vis_dir: Optional[str] = None,
+        layout_dir: Optional[str] = None,
+    ):
+        """
+        :param moma: the MOMA object
+        :type moma: MOMA
+        :param vis_dir: directory to save visualizations to (default: a temporary
+            directory)
+        :type vis_dir: Optional[str]
+        :param layout_dir: directory to cache graph layouts in, which can be shared
+            by visualizers (default: ``layout`` in ``vis_dir``)
+        :type layout_dir: Optional[str]
+        """
         if vis_dir is None:
             vis_dir = tempfile.mkdtemp()
         else:
@@ -40,37 +113,59 @@ class AnnVisualizer:
         self.hoi_dir = osp.join(self.vis_dir, "hoi")
         os.makedirs(self.hoi_dir, exist_ok=True)
 
-    @staticmethod
-    def _get_palette(ids, alpha=255):
-        # distinctipy's representation
-        colors_box = distinctipy.get_colors(len(ids))
-        colors_text = [
-            distinctipy.get_text_color(color_box) for color_box in colors_box
-        ]
-
-        # PIL's representation
-        colors_box = [
-            tuple([int(x * 255) for x in color_box] + [alpha])
-            for color_box in colors_box
-        ]
-        colors_text = [
-            tuple([int(x * 255) for x in color_text] + [alpha])
-            for color_text in colors_text
-        ]
-
-        palette = {
-            id: (color_box, color_text)
-            for id, color_box, color_text in zip(ids, colors_box, colors_text)
-        }
+        if layout_dir is None:
+            layout_dir = osp.join(self.vis_dir, "layout")
+        self.layout_dir = layout_dir
+        os.makedirs(self.layout_dir, exist_ok=True)
+
+        # caches shared by every image rendered by this visualizer
+        self.palette = {}
+        self.fonts = {}
+        self.metadata = {}
+
+    def _get_palette(self, ids, alpha=255):
+        if (len(ids), alpha) not in self.palette:
+            # distinctipy's representation
+            colors_box = distinctipy.get_colors(len(ids))
+            colors_text = [
+                distinctipy.get_text_color(color_box) for color_box in colors_box
+            ]
+
+            # PIL's representation
+            colors_box = [
+                tuple([int(x * 255) for x in color_box] + [alpha])
+                for color_box in colors_box
+            ]
+            colors_text = [
+                tuple([int(x * 255) for x in color_text] + [alpha])
+                for color_text in colors_text
+            ]
+            self.palette[(len(ids), alpha)] = list(zip(colors_box, colors_text))
+
+        palette = dict(zip(ids, self.palette[(len(ids), alpha)]))
         return palette
 
+    def _get_font(self, size):
+        if size not in self.fonts:
+            font_props = font_manager.FontProperties(
+                family="sans-serif", stretch="extra-condensed", weight="light"
+            )
+            path_font = font_manager.findfont(font_props)
+            self.fonts[size] = ImageFont.truetype(path_font, size)
+        return self.fonts[size]
+
+    def _get_metadatum(self, id_hoi):
+        id_act = self.moma.lookup.map_id("id_act", id_hoi=id_hoi)
+        if id_act not in self.metadata:
+            self.metadata[id_act] = only(self.moma.get_metadata(ids_act=[id_act]))
+        return self.metadata[id_act]
+
     def _draw_bbox(self, ann_hoi: HOI, palette):
         hoi_id = assert_type(ann_hoi.id, str)
-        act_id = only(self.moma.get_ids_act(ids_hoi=[hoi_id]))
-        metadata = only(self.moma.get_metadata(ids_act=[act_id]))
+        metadata = self._get_metadatum(hoi_id)
 
         path_image = only(self.moma.get_paths(ids_hoi=[hoi_id]))
-        image = io.read_image(path_image).permute(1, 2, 0).numpy()
+        image = read_image(path_image).permute(1, 2, 0).numpy()
         image = Image.fromarray(image).convert("RGBA")
 
         x_scale = metadata.width / image.width
@@ -82,11 +177,7 @@ class AnnVisualizer:
         draw = ImageDraw.Draw(overlay, "RGBA")
         width_line = int(max(image.size) * 0.003)
 
-        font_props = font_manager.FontProperties(
-            family="sans-serif", stretch="extra-condensed", weight="light"
-        )
-        path_font = font_manager.findfont(font_props)
-        font = ImageFont.truetype(path_font, int(max(image.size) * 0.02))
+        font = self._get_font(int(max(image.size) * 0.02))
 
         for entity in ann_hoi.actors + ann_hoi.objects:
             bbox = BBox.scale(entity.bbox, scale_factor=scale)
@@ -121,19 +212,177 @@ class AnnVisualizer:
 
     @supress_stdout
     def show_hoi(self, id_hoi: str, vstack: bool = True):
+        return self._render_hoi(id_hoi, vstack)
+
+    @supress_stdout
+    def render_hois(
+        self,
+        ids_hoi: list[str],
+        vstack: bool = True,
+        workers: int = 1,
+        processes: bool = False,
+    ) -> list[str]:
+        """
+        Render many higher-order interactions, as show_hoi() does for one. Renders
+        that are up to date with their annotations are not rendered again.
+
+        Fonts, palettes and metadata are cached by the visualizer, so rendering is
+        bound by image decoding and encoding. With ``processes=True``, each worker
+        process builds its own MOMA object and visualizer once, which avoids
+        contention on the GIL and graphviz at the cost of a slower start.
+
+        :param ids_hoi: higher-order interaction instance IDs
+        :type ids_hoi: list[str]
+        :param vstack: stack the graph below the image instead of beside it
+        :type vstack: bool
+        :param workers: number of worker threads or processes
+        :type workers: int
+        :param processes: use a process pool instead of a thread pool
+        :type processes: bool
+        :return: paths to the rendered images, in the order of ``ids_hoi``
+        :rtype: list[str]
+        """
+        if workers <= 1:
+            return [self._render_hoi(id_hoi, vstack) for id_hoi in ids_hoi]
+
+        if processes:
+            with ProcessPoolExecutor(
+                workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.moma.dir_moma,
+                    self.moma.paradigm,
+                    self.vis_dir,
+                    self.layout_dir,
+                ),
+            ) as executor:
+                chunksize = max(1, len(ids_hoi) // (workers * 4))
+                paths = executor.map(
+                    partial(_render_hoi, vstack=vstack), ids_hoi, chunksize=chunksize
+                )
+                return list(paths)
+
+        with ThreadPoolExecutor(workers) as executor:
+            paths = executor.map(partial(self._render_hoi, vstack=vstack), ids_hoi)
+            return list(paths)
+
+    @staticmethod
+    def _hash(**content):
+        content = _to_builtin({"version": version_render, **content})
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _stat(path):
+        if not osp.isfile(path):
+            return None
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _get_hash_hoi(self, id_hoi, vstack):
+        """
+        Hash everything a rendered higher-order interaction depends on
+        """
+        path_image = only(self.moma.get_paths(ids_hoi=[id_hoi], sanity_check=False))
+        return self._hash(
+            vstack=vstack,
+            ann_hoi=only(self.moma.get_anns_hoi(ids_hoi=[id_hoi])),
+            metadatum=self._get_metadatum(id_hoi),
+            image=self._stat(path_image),
+        )
+
+    def _get_hash_sact(self, id_sact, vstack, format):
+        """
+        Hash everything an animated sub-activity depends on, including the timeline
+        of its activity
+        """
+        id_act = only(self.moma.get_ids_act(ids_sact=[id_sact]))
+        ids_hoi = self.moma.get_ids_hoi(ids_sact=[id_sact])
+        paths_image = self.moma.get_paths(ids_hoi=ids_hoi, sanity_check=False)
+        return self._hash(
+            vstack=vstack,
+            format=format,
+            id_sact=id_sact,
+            ann_act=only(self.moma.get_anns_act(ids_act=[id_act])),
+            anns_sact=self.moma.get_anns_sact(
+                ids_sact=self.moma.get_ids_sact(ids_act=[id_act])
+            ),
+            anns_hoi=self.moma.get_anns_hoi(ids_hoi=ids_hoi),
+            metadatum=only(self.moma.get_metadata(ids_act=[id_act])),
+            images=[self._stat(path_image) for path_image in paths_image],
+        )
+
+    @staticmethod
+    def _is_fresh(path, digest):
+        """
+        Whether a render exists and was rendered from content with the given hash,
+        which is stored next to it
+        """
+        if not osp.isfile(path) or not osp.isfile(f"{path}.sha1"):
+            return False
+        with open(f"{path}.sha1", "r") as f:
+            return f.read() == digest
+
+    @staticmethod
+    def _save_hash(path, digest):
+        with open(f"{path}.sha1", "w") as f:
+            f.write(digest)
+
+    def get_stale(
+        self,
+        ids_hoi: Optional[list[str]] = None,
+        ids_sact: Optional[list[str]] = None,
+        vstack: bool = True,
+        format: str = "gif",
+    ) -> list[str]:
+        """
+        Get the higher-order interactions or sub-activities whose renders are missing
+        or out of date with their annotations, images or render options. Pass them to
+        render_hois() or show_sact() to re-render only what is stale.
+
+        :param ids_hoi: higher-order interaction instance IDs
+        :type ids_hoi: Optional[list[str]]
+        :param ids_sact: sub-activity instance IDs
+        :type ids_sact: Optional[list[str]]
+        :param vstack: the option the renders are requested with
+        :type vstack: bool
+        :param format: the format sub-activities are requested in
+        :type format: str
+        :return: the stale IDs
+        :rtype: list[str]
+        """
+        assert sum([x is not None for x in [ids_hoi, ids_sact]]) == 1
+
+        if ids_hoi is not None:
+            return [
+                id_hoi
+                for id_hoi in ids_hoi
+                if not self._is_fresh(
+                    osp.join(self.hoi_dir, f"{id_hoi}.png"),
+                    self._get_hash_hoi(id_hoi, vstack),
+                )
+            ]
+        else:
+            return [
+                id_sact
+                for id_sact in ids_sact
+                if not self._is_fresh(
+                    osp.join(self.sact_dir, f"{id_sact}.{format}"),
+                    self._get_hash_sact(id_sact, vstack, format),
+                )
+            ]
+
+    def _render_hoi(self, id_hoi, vstack):
         path_hoi = osp.join(self.hoi_dir, f"{id_hoi}.png")
 
-        if osp.isfile(path_hoi):
+        digest = self._get_hash_hoi(id_hoi, vstack)
+        if self._is_fresh(path_hoi, digest):
             return path_hoi
 
-        act_id = only(self.moma.get_ids_act(ids_hoi=[id_hoi]))
         ann_hoi = only(self.moma.get_anns_hoi(ids_hoi=[id_hoi]))
         palette = self._get_palette(ann_hoi.ids_actor + ann_hoi.ids_object, alpha=150)
 
         """ bbox """
-        image = self._draw_bbox(ann_hoi, palette)
-        path_bbox = osp.join(self.hoi_dir, f"bbox_{id_hoi}.png")
-        image.save(path_bbox)
+        image_bbox = self._draw_bbox(ann_hoi, palette)
 
         """ graph """
         G = pgv.AGraph(directed=True, strict=True)
@@ -175,77 +424,181 @@ class AnnVisualizer:
                 len=2,
             )
 
-        G.layout("neato")
-        G.node_attr["fontname"] = "Arial"
-        G.edge_attr["fontname"] = "Arial"
-        path_graph = osp.join(self.hoi_dir, f"graph_{id_hoi}.eps")
-        G.draw(path_graph)
+        with _lock_graphviz:
+            self._layout(G)
+            G.node_attr["fontname"] = "Arial"
+            G.edge_attr["fontname"] = "Arial"
+            image_graph = self._draw_graph(G, image_bbox.size, vstack)
 
         """ save """
-        image_bbox = Image.open(path_bbox)
-        image_graph = Image.open(path_graph)
+        image = self._stack(image_bbox, image_graph, vstack=vstack)
+        image.save(path_hoi)
+        self._save_hash(path_hoi, digest)
 
-        width_bbox, height_bbox = image_bbox.size
-        width_graph, height_graph = image_graph.size
+        return path_hoi
 
-        if vstack:
-            scale = math.ceil(width_bbox / width_graph)
-            image_graph.load(scale=scale)
-            image_graph = image_graph.resize(
-                (width_bbox, round(width_bbox * height_graph / width_graph))
-            )
+    @staticmethod
+    def _hash_graph(G, prog):
+        """
+        Hash the structure and labels of a graph, which determine its layout
+        """
+        nodes = []
+        for node in G.nodes():
+            attrs = {k: v for k, v in node.attr.items() if k in attrs_layout_node}
+            nodes.append([str(node), attrs])
+        edges = []
+        for edge in G.edges():
+            attrs = {k: v for k, v in edge.attr.items() if k in attrs_layout_edge}
+            edges.append([str(edge[0]), str(edge[1]), attrs])
+
+        graph = {
+            "prog": prog,
+            "directed": G.is_directed(),
+            "strict": G.is_strict(),
+            "graph_attr": dict(G.graph_attr.items()),
+            "nodes": sorted(nodes, key=json.dumps),
+            "edges": sorted(edges, key=json.dumps),
+        }
+        return hashlib.sha1(json.dumps(graph, sort_keys=True).encode()).hexdigest()
+
+    def _layout(self, G, prog="neato"):
+        """
+        Lay out a graph, reusing the cached layout of a graph with the same structure
+        and labels if there is one. Either way, the positions are stored in the
+        attributes of the graph, so it can be drawn without laying it out again.
+        """
+        path_layout = osp.join(self.layout_dir, f"{self._hash_graph(G, prog)}.json")
+
+        if osp.isfile(path_layout):
+            with open(path_layout, "r") as f:
+                layout = json.load(f)
+
+            G.graph_attr["bb"] = layout["bb"]
+            for node in G.nodes():
+                node.attr.update(layout["nodes"][str(node)])
+            for edge in G.edges():
+                key = json.dumps([str(edge[0]), str(edge[1]), edge.attr.get("label")])
+                edge.attr.update(layout["edges"][key])
+            # otherwise, draw() refuses to draw the graph without a layout program
+            G.has_layout = True
+            return
+
+        G.layout(prog)
+
+        layout = {"bb": G.graph_attr["bb"], "nodes": {}, "edges": {}}
+        for node in G.nodes():
+            layout["nodes"][str(node)] = {
+                k: v for k, v in node.attr.items() if k in attrs_pos_node and v
+            }
+        for edge in G.edges():
+            key = json.dumps([str(edge[0]), str(edge[1]), edge.attr.get("label")])
+            layout["edges"][key] = {
+                k: v for k, v in edge.attr.items() if k in attrs_pos_edge and v
+            }
 
-            image = Image.new(
-                "RGB", (image_bbox.width, image_bbox.height + image_graph.height)
-            )
-            image.paste(image_bbox, (0, 0))
-            image.paste(image_graph, (0, image_bbox.height))
+        # written atomically, since visualizers may share the cache
+        path_tmp = f"{path_layout}.{os.getpid()}.{threading.get_ident()}"
+        with open(path_tmp, "w") as f:
+            json.dump(layout, f)
+        os.replace(path_tmp, path_layout)
 
-        else:  # hstack
-            scale = math.ceil(height_bbox / height_graph)
-            image_graph.load(scale=scale)
-            image_graph = image_graph.resize(
-                (round(height_bbox * width_graph / height_graph), height_bbox)
-            )
+    @staticmethod
+    def _draw_graph(G, size_bbox, vstack):
+        """
+        Rasterize a graph that has been laid out, in memory, to the width (vstack) or
+        height (hstack) of the bounding box image
+        """
+        # render at a multiple of 72 dpi so that downscaling is the only resampling,
+        # like loading the EPS output of graphviz at a scale
+        llx, lly, urx, ury = [float(x) for x in G.graph_attr["bb"].split(",")]
+        width_graph, height_graph = urx - llx + 8, ury - lly + 8  # 4pt pad
+        if vstack:
+            scale = math.ceil(size_bbox[0] / width_graph)
+        else:
+            scale = math.ceil(size_bbox[1] / height_graph)
+        G.graph_attr["dpi"] = 72 * scale
+        G.graph_attr["bgcolor"] = "white"
 
-            image = Image.new(
-                "RGB", (image_bbox.width + image_graph.width, image_bbox.height)
-            )
-            image.paste(image_bbox, (0, 0))
-            image.paste(image_graph, (image_bbox.width, 0))
+        image_graph = Image.open(io.BytesIO(G.draw(format="png"))).convert("RGB")
+        width_graph, height_graph = image_graph.size
+        if vstack:
+            width = size_bbox[0]
+            size_graph = (width, round(width * height_graph / width_graph))
+        else:
+            height = size_bbox[1]
+            size_graph = (round(height * width_graph / height_graph), height)
 
-        image.save(path_hoi)
+        return image_graph.resize(size_graph)
 
-        # cleanup
-        os.remove(path_bbox)
-        os.remove(path_graph)
-        image_bbox.close()
-        image_graph.close()
+    @staticmethod
+    def _stack(image_bbox, image_graph, image_timeline=None, vstack=True):
+        """
+        Composite the bounding box image, the graph and, optionally, the timeline of
+        a frame. The graph must already be the width (vstack) or height (hstack) of
+        the bounding box image.
+        """
+        if vstack:
+            images = [image_bbox, image_graph]
+        else:  # hstack
+            images = [
+                np.concatenate([np.asarray(image_bbox), np.asarray(image_graph)], 1)
+            ]
+
+        if image_timeline is not None:
+            width = np.asarray(images[0]).shape[1]
+            image_timeline = image_timeline.convert("RGB").resize(
+                (width, round(width * image_timeline.height / image_timeline.width))
+            )
+            images.append(image_timeline)
 
-        return path_hoi
+        image = np.concatenate([np.asarray(x) for x in images], 0)
+        return Image.fromarray(image)
 
     @supress_stdout
-    def show_sact(self, id_sact: str, vstack: bool = True):
-        path_sact = osp.join(self.sact_dir, f"{id_sact}.gif")
-        if osp.isfile(path_sact):
+    def show_sact(self, id_sact: str, vstack: bool = True, format: str = "gif"):
+        """
+        Animate a sub-activity, one frame per higher-order interaction. Frames are
+        encoded as they are rendered, so memory use does not grow with the number of
+        frames.
+
+        :param id_sact: sub-activity instance ID
+        :type id_sact: str
+        :param vstack: stack the graph below the image instead of beside it
+        :type vstack: bool
+        :param format: ``gif``, or ``mp4`` or ``webp`` (encoded with ffmpeg)
+        :type format: Literal['gif', 'mp4', 'webp']
+        :return: path to the animation
+        :rtype: str
+        """
+        path_sact = osp.join(self.sact_dir, f"{id_sact}.{format}")
+
+        digest = self._get_hash_sact(id_sact, vstack, format)
+        if self._is_fresh(path_sact, digest):
             return path_sact
 
-        cache_dir = osp.join(self.sact_dir, id_sact)
-        if os.path.exists(cache_dir):
-            shutil.rmtree(cache_dir)
-        os.makedirs(cache_dir, exist_ok=False)
+        frames = self._iter_frames_sact(id_sact, vstack)
+        write_frames(path_sact, frames, duration=250, colors=self._get_colors(id_sact))
+        self._save_hash(path_sact, digest)
+
+        return path_sact
 
+    def _get_colors(self, id_sact):
+        """
+        Colors of the entities and the graph of a sub-activity, which are reserved
+        in the palette of a GIF since they may not all be in the first frame
+        """
+        ann_sact = only(self.moma.get_anns_sact(ids_sact=[id_sact]))
+        palette = self._get_palette(ann_sact.ids_actor + ann_sact.ids_object, alpha=200)
+        colors = [color[:3] for colors in palette.values() for color in colors]
+        colors += [ImageColor.getrgb(color) for color in colors_graph]
+        return colors
+
+    def _iter_frames_sact(self, id_sact, vstack):
         ann_sact = only(self.moma.get_anns_sact(ids_sact=[id_sact]))
         ids_hoi = self.moma.get_ids_hoi(ids_sact=[id_sact])
         anns_hoi = self.moma.get_anns_hoi(ids_hoi=ids_hoi)
         palette = self._get_palette(ann_sact.ids_actor + ann_sact.ids_object, alpha=200)
 
-        """ bbox """
-        for i, id_hoi in enumerate(ids_hoi):
-            ann_hoi = only(self.moma.get_anns_hoi(ids_hoi=[id_hoi]))
-            image = self._draw_bbox(ann_hoi, palette)
-            image.save(osp.join(cache_dir, f"bbox_{str(i).zfill(2)}.png"))
-
         """ graph """
         # get node & edge positions
         info_nodes = []
@@ -292,7 +645,8 @@ class AnnVisualizer:
                 fontsize="10",
                 len=2,
             )
-        G.layout("neato")
+        with _lock_graphviz:
+            self._layout(G)
         G.node_attr["fontname"] = "Arial"
         G.edge_attr["fontname"] = "Arial"
 
@@ -301,8 +655,21 @@ class AnnVisualizer:
 
         G.remove_nodes_from([info_node[0] for info_node in info_nodes])
 
-        # draw graphs
-        for i, ann_hoi in enumerate(anns_hoi):
+        id_act = only(self.moma.get_ids_act(ids_sact=[id_sact]))
+        images_timeline = self.timeline_visualizer.iter_frames(
+            id_act=id_act, id_sact=id_sact, ids_hoi=ids_hoi
+        )
+
+        # draw frames
+        size_bbox = None
+        for ann_hoi, image_timeline in zip(anns_hoi, images_timeline):
+            """ bbox """
+            image_bbox = self._draw_bbox(ann_hoi, palette)
+            if size_bbox is None:
+                size_bbox = image_bbox.size
+            assert image_bbox.size == size_bbox
+
+            """ graph """
             # draw nodes
             data_node = []
             for info_node in info_nodes:
@@ -363,109 +730,8 @@ class AnnVisualizer:
                     len=2,
                 )
 
-            G.draw(osp.join(cache_dir, f"graph_{str(i).zfill(2)}.eps"))
+            with _lock_graphviz:
+                image_graph = self._draw_graph(G, size_bbox, vstack)
             G.remove_nodes_from([info_node[0] for info_node in info_nodes])
 
-            id_act = only(self.moma.get_ids_act(ids_sact=[id_sact]))
-            id_hoi = ann_hoi.id
-            path_timeline = osp.join(cache_dir, f"timeline_{str(i).zfill(2)}.png")
-            self.timeline_visualizer.show(
-                id_act=id_act, id_sact=id_sact, id_hoi=id_hoi, path=path_timeline
-            )
-
-        """ save """
-        paths_bbox = sorted(glob.glob(osp.join(cache_dir, "bbox_*.png")))
-        paths_graph = sorted(glob.glob(osp.join(cache_dir, "graph_*.eps")))
-        paths_timeline = sorted(glob.glob(osp.join(cache_dir, f"timeline_*.png")))
-
-        images_bbox = [Image.open(path_bbox) for path_bbox in paths_bbox]
-        images_graph = [Image.open(path_graph) for path_graph in paths_graph]
-        images_timeline = [
-            Image.open(path_timeline) for path_timeline in paths_timeline
-        ]
-
-        assert all(image_bbox.size == images_bbox[0].size for image_bbox in images_bbox)
-        assert all(
-            image_graph.size == images_graph[0].size for image_graph in images_graph
-        )
-        assert all(
-            image_timeline.size == images_timeline[0].size
-            for image_timeline in images_timeline
-        )
-
-        width_bbox, height_bbox = images_bbox[0].size
-        width_graph, height_graph = images_graph[0].size
-        width_timeline, height_timeline = images_timeline[0].size
-
-        images = []
-        if vstack:
-            scale = math.ceil(width_bbox / width_graph)
-            for image_bbox, image_graph, image_timeline in zip(
-                images_bbox, images_graph, images_timeline
-            ):
-                image_graph.load(scale=scale)
-                image_graph = image_graph.resize(
-                    (width_bbox, round(width_bbox * height_graph / width_graph))
-                )
-                image_timeline = image_timeline.resize(
-                    (width_bbox, round(width_bbox * height_timeline / width_timeline))
-                )
-                image = Image.new(
-                    "RGB",
-                    (
-                        image_bbox.width,
-                        image_bbox.height + image_graph.height + image_timeline.height,
-                    ),
-                )
-                image.paste(image_bbox, (0, 0))
-                image.paste(image_graph, (0, image_bbox.height))
-                image.paste(image_timeline, (0, image_bbox.height + image_graph.height))
-                images.append(image)
-
-        else:  # hstack
-            scale = math.ceil(height_bbox / height_graph)
-            for image_bbox, image_graph, image_timeline in zip(
-                images_bbox, images_graph, images_timeline
-            ):
-                image_graph.load(scale=scale)
-                image_graph = image_graph.resize(
-                    (round(height_bbox * width_graph / height_graph), height_bbox)
-                )
-                image_timeline = image_timeline.resize(
-                    (
-                        image_bbox.width + image_graph.width,
-                        round(
-                            (image_bbox.width + image_graph.width)
-                            * height_timeline
-                            / width_timeline
-                        ),
-                    )
-                )
-                image = Image.new(
-                    "RGB",
-                    (
-                        image_bbox.width + image_graph.width,
-                        image_bbox.height + image_timeline.height,
-                    ),
-                )
-                image.paste(image_bbox, (0, 0))
-                image.paste(image_graph, (image_bbox.width, 0))
-                image.paste(image_timeline, (0, image_bbox.height))
-                images.append(image)
-
-        images[0].save(
-            path_sact,
-            format="GIF",
-            append_images=images[1:],
-            save_all=True,
-            duration=250,
-            loop=0,
-        )
-
-        # cleanup
-        shutil.rmtree(cache_dir)
-        [image_bbox.close() for image_bbox in images_bbox]
-        [image_graph.close() for image_graph in images_graph]
-        [image_timeline.close() for image_timeline in images_timeline]
-
-        return path_sact
+            yield self._stack(image_bbox, image_graph, image_timeline, vstack)
@@ -0,0 +1,317 @@
+"""
+Videos of activities and sub-activities with the bounding boxes of their entities
+drawn on. Boxes are annotated at the higher-order interactions only, so they are
+interpolated linearly between them.
+
+The video is decoded once as a stream of raw frames, the boxes are interpolated for
+a chunk of frames at a time, and frames are piped to the encoder as they are drawn,
+so memory use does not grow with the length of the video.
+"""
+
+import os
+import os.path as osp
+import tempfile
+
+from distinctipy import distinctipy
+from matplotlib import font_manager
+import numpy as np
+import PIL.Image as Image
+import PIL.ImageDraw as ImageDraw
+import PIL.ImageFont as ImageFont
+
+from ..utils import only
+from .writers import write_frames
+
+# number of frames to interpolate the boxes of at once
+size_chunk = 256
+
+
+def _probe(path):
+    import ffmpeg
+
+    probe = ffmpeg.probe(path)
+    stream = next(x for x in probe["streams"] if x["codec_type"] == "video")
+    num, den = stream["avg_frame_rate"].split("/")
+    return int(stream["width"]), int(stream["height"]), int(num) / int(den)
+
+
+def _decode(path, width, height):
+    """
+    Decode a video into a stream of (H,W,3) uint8 frames. Each frame is read into a
+    new buffer, so it can be drawn on.
+    """
+    import ffmpeg
+
+    process = (
+        ffmpeg.input(path)
+        .output("pipe:", format="rawvideo", pix_fmt="rgb24")
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+
+    try:
+        while True:
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            if process.stdout.readinto(memoryview(frame).cast("B")) < frame.nbytes:
+                break
+            yield frame
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed:\n{stderr.decode()}")
+
+
+def interpolate_tracks(times_key, bboxes, masks, times):
+    """
+    Interpolate bounding box tracks at arbitrary times. A box is interpolated
+    linearly between two keyframes if the entity is present in both. Otherwise, the
+    box of the nearest keyframe is used if the entity is present in it, and boxes
+    are held before the first and after the last keyframe.
+
+    :param times_key: (T,) increasing times of the keyframes
+    :param bboxes: (N,T,4) ``[x, y, w, h]`` bounding boxes at the keyframes, which
+        can be ``nan`` where an entity is absent
+    :param masks: (N,T) presence of the entities at the keyframes
+    :param times: (F,) times to interpolate the boxes at
+    :return: (N,F,4) bounding boxes and (N,F) visibility of the entities
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    times_key = np.asarray(times_key, dtype=float)
+    times = np.asarray(times, dtype=float)
+    bboxes = np.nan_to_num(np.asarray(bboxes, dtype=float))
+    masks = np.asarray(masks, dtype=bool)
+
+    # keyframes on either side of each time
+    index_right = np.searchsorted(times_key, times, side="right")
+    index_right = index_right.clip(0, len(times_key) - 1)
+    index_left = (index_right - 1).clip(0, None)
+
+    interval = times_key[index_right] - times_key[index_left]
+    weights = np.divide(
+        times - times_key[index_left],
+        interval,
+        out=np.zeros_like(times),
+        where=interval > 0,
+    ).clip(0, 1)
+
+    mask_left, mask_right = masks[:, index_left], masks[:, index_right]
+    bboxes_left, bboxes_right = bboxes[:, index_left], bboxes[:, index_right]
+    is_both = mask_left & mask_right
+    is_left = mask_left & (weights < 0.5)
+    is_right = mask_right & (weights >= 0.5)
+
+    bboxes_lerp = bboxes_left + weights[:, None] * (bboxes_right - bboxes_left)
+    bboxes = np.where(
+        is_both[..., None],
+        bboxes_lerp,
+        np.where(mask_left[..., None], bboxes_left, bboxes_right),
+    )
+    visibility = is_both | is_left | is_right
+
+    return bboxes, visibility
+
+
+class OverlayVisualizer:
+    def __init__(self, moma, dir_vis=None):
+        """
+        :param moma: the MOMA object
+        :type moma: MOMA
+        :param dir_vis: directory to save visualizations to (default: a temporary
+            directory)
+        :type dir_vis: Optional[str]
+        """
+        if dir_vis is None:
+            dir_vis = tempfile.mkdtemp()
+
+        self.moma = moma
+        self.dir_vis = dir_vis
+        self.dir_overlay = osp.join(dir_vis, "overlay")
+        os.makedirs(self.dir_overlay, exist_ok=True)
+
+        self.palette = {}
+        self.fonts = {}
+
+    def _get_palette(self, num_colors):
+        if num_colors not in self.palette:
+            colors_box = distinctipy.get_colors(num_colors)
+            colors_text = [distinctipy.get_text_color(x) for x in colors_box]
+            self.palette[num_colors] = [
+                (
+                    np.array([int(x * 255) for x in color_box], dtype=np.uint8),
+                    tuple(int(x * 255) for x in color_text),
+                )
+                for color_box, color_text in zip(colors_box, colors_text)
+            ]
+        return self.palette[num_colors]
+
+    def _get_font(self, size):
+        if size not in self.fonts:
+            font_props = font_manager.FontProperties(
+                family="sans-serif", stretch="extra-condensed", weight="light"
+            )
+            path_font = font_manager.findfont(font_props)
+            self.fonts[size] = ImageFont.truetype(path_font, size)
+        return self.fonts[size]
+
+    def _get_label(self, cname, color_box, color_text, font, width_line):
+        """
+        Render a label once, so that it is pasted onto frames as an array
+        """
+        left, top, right, bottom = font.getbbox(cname)
+        size = (right - left + 2 * width_line, bottom - top + 2 * width_line)
+        image = Image.new("RGB", size, tuple(color_box.tolist()))
+        draw = ImageDraw.Draw(image)
+        draw.text(
+            (width_line - left, width_line - top), cname, fill=color_text, font=font
+        )
+        return np.asarray(image)
+
+    def _get_tracks(self, ids_sact, scale, size):
+        """
+        Concatenate the tracks of sub-activities. Each entity is only visible during
+        its sub-activity.
+
+        :return: the keyframe times and boxes of each sub-activity, and the labels
+            and box colors of all entities
+        """
+        tracks, labels, colors = [], [], []
+        width_line = max(1, int(max(size) * 0.003))
+        font = self._get_font(max(8, int(max(size) * 0.02)))
+
+        for ann_sact in self.moma.get_anns_sact(ids_sact=ids_sact):
+            if ann_sact.length == 0:
+                continue
+
+            bboxes, masks, _, _ = ann_sact.get_tracks(full_res=True)
+            aacts = ann_sact.aacts_actor + ann_sact.aacts_object
+            palette = self._get_palette(len(aacts))
+
+            # HOIs are not necessarily in chronological order
+            times = np.array(ann_sact.times, dtype=float)
+            order = np.argsort(times, kind="stable")
+            tracks.append(
+                (
+                    ann_sact.start,
+                    ann_sact.end,
+                    times[order],
+                    bboxes[:, order] / scale,
+                    masks[:, order],
+                )
+            )
+            for aact, (color_box, color_text) in zip(aacts, palette):
+                labels.append(
+                    self._get_label(
+                        aact.cname_entity, color_box, color_text, font, width_line
+                    )
+                )
+                colors.append(color_box)
+
+        return tracks, labels, colors, width_line
+
+    def _iter_frames(self, frames, tracks, labels, colors, width_line, start, fps):
+        for i, frame in enumerate(frames):
+            if i % size_chunk == 0:
+                # absolute times of the frames in the chunk
+                times = start + np.arange(i, i + size_chunk) / fps
+                bboxes = [np.zeros((0, size_chunk, 4))]
+                visibility = [np.zeros((0, size_chunk), dtype=bool)]
+                for start_sact, end_sact, times_key, bboxes_key, masks_key in tracks:
+                    bboxes_sact, visibility_sact = interpolate_tracks(
+                        times_key, bboxes_key, masks_key, times
+                    )
+                    visibility_sact &= (start_sact <= times) & (times < end_sact)
+                    bboxes.append(bboxes_sact)
+                    visibility.append(visibility_sact)
+                bboxes = np.concatenate(bboxes).round().astype(int)
+                visibility = np.concatenate(visibility)
+
+                # [x, y, w, h] -> [x1, y1, x2, y2], clipped to the frame
+                bboxes[..., 2:] += bboxes[..., :2]
+                bboxes[..., [0, 2]] = bboxes[..., [0, 2]].clip(0, frame.shape[1])
+                bboxes[..., [1, 3]] = bboxes[..., [1, 3]].clip(0, frame.shape[0])
+
+            for j in np.flatnonzero(visibility[:, i % size_chunk]):
+                x1, y1, x2, y2 = bboxes[j, i % size_chunk]
+                color, label = colors[j], labels[j]
+                frame[y1 : y1 + width_line, x1:x2] = color
+                frame[max(y1, y2 - width_line) : y2, x1:x2] = color
+                frame[y1:y2, x1 : x1 + width_line] = color
+                frame[y1:y2, max(x1, x2 - width_line) : x2] = color
+
+                label = label[: frame.shape[0] - y1, : frame.shape[1] - x1]
+                frame[y1 : y1 + label.shape[0], x1 : x1 + label.shape[1]] = label
+
+            yield frame
+
+    def _render(self, path_src, path_trg, id_act, ids_sact, start):
+        width, height, fps = _probe(path_src)
+        metadatum = only(self.moma.get_metadata(ids_act=[id_act]))
+        scale = metadatum.width / width
+
+        tracks, labels, colors, width_line = self._get_tracks(
+            ids_sact, scale, (width, height)
+        )
+        frames = self._iter_frames(
+            _decode(path_src, width, height),
+            tracks,
+            labels,
+            colors,
+            width_line,
+            start,
+            fps,
+        )
+        colors_text = [color_text for _, color_text in self._get_palette(len(colors))]
+        write_frames(
+            path_trg,
+            frames,
+            duration=1000 / fps,
+            colors=[tuple(color.tolist()) for color in colors] + colors_text,
+        )
+
+        return path_trg
+
+    def show_sact(self, id_sact, full_res=False, format="mp4"):
+        """
+        Draw the entities of a sub-activity on its video.
+
+        :param id_sact: sub-activity instance ID
+        :type id_sact: str
+        :param full_res: draw on the full-resolution video
+        :type full_res: bool
+        :param format: ``mp4``, ``webp`` or ``gif``
+        :type format: Literal['mp4', 'webp', 'gif']
+        :return: path to the video
+        :rtype: str
+        """
+        id_act = only(self.moma.get_ids_act(ids_sact=[id_sact]))
+        ann_sact = only(self.moma.get_anns_sact(ids_sact=[id_sact]))
+        path_src = only(self.moma.get_paths(ids_sact=[id_sact], full_res=full_res))
+        path_trg = osp.join(
+            self.dir_overlay, f"{id_sact}{'_fr' if full_res else ''}.{format}"
+        )
+        return self._render(path_src, path_trg, id_act, [id_sact], ann_sact.start)
+
+    def show_act(self, id_act, full_res=False, format="mp4"):
+        """
+        Draw the entities of every sub-activity of an activity on its video.
+
+        :param id_act: activity instance ID
+        :type id_act: str
+        :param full_res: draw on the full-resolution video
+        :type full_res: bool
+        :param format: ``mp4``, ``webp`` or ``gif``
+        :type format: Literal['mp4', 'webp', 'gif']
+        :return: path to the video
+        :rtype: str
+        """
+        ann_act = only(self.moma.get_anns_act(ids_act=[id_act]))
+        path_src = only(self.moma.get_paths(ids_act=[id_act], full_res=full_res))
+        path_trg = osp.join(
+            self.dir_overlay, f"{id_act}{'_fr' if full_res else ''}.{format}"
+        )
+        return self._render(
+            path_src, path_trg, id_act, ann_act.ids_sact, ann_act.start
+        )
@@ -1,11 +1,123 @@
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+import numpy as np
 import os
 import os.path as osp
-from pprint import pprint
-import seaborn as sns
 import tempfile
 
 
+def _plot(cnames, counts, splits, path, backend):
+    """
+    Plot class distributions as a log-scale bar chart. Runs in a worker process.
+
+    :param cnames: (C,) class names
+    :param counts: (S,C) number of instances of each class in each split
+    :param splits: (S,) split names, or None for a single distribution
+    """
+    if backend == "seaborn":
+        _plot_seaborn(cnames, counts, splits, path)
+    else:
+        _plot_matplotlib(cnames, counts, splits, path)
+    return path
+
+
+def _plot_seaborn(cnames, counts, splits, path):
+    import seaborn as sns
+
+    sns.set(style="darkgrid")
+
+    width = max(20, int(0.25 * counts.size))
+    height = int(0.5 * width)
+
+    # not managed by pyplot, so that nothing has to be closed
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    sns.barplot(
+        x=np.tile(cnames, len(counts)),
+        y=counts.ravel(),
+        hue=None if splits is None else np.repeat(splits, counts.shape[1]),
+        ci=None,
+        ax=ax,
+        color=None if splits is not None else "seagreen",
+        palette="dark" if splits is not None else None,
+    )
+    ax.set_yscale("log")
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
+    ax.set(xlabel="class", ylabel="count")
+    ax.set_ylim(bottom=1)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def _plot_matplotlib(cnames, counts, splits, path):
+    """
+    Most of the time of the seaborn plot goes to rasterizing a figure that is half
+    as tall as it is wide, and to laying it out twice with tight_layout(). Here, the
+    figure has a fixed height, each split is a single collection of bars, and the
+    margins are computed from the longest class name only.
+    """
+    num_splits, num_classes = counts.shape
+    width = max(20, 0.1 * counts.size)
+    height = 10
+
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    # bars from 1, the bottom of the log scale
+    x = np.arange(num_classes)
+    width_bar = 0.8 / num_splits
+    colors = ["seagreen"] if splits is None else [f"C{i}" for i in range(3)]
+    for i, counts_split in enumerate(counts):
+        left = x + (i - (num_splits - 1) / 2) * width_bar - width_bar / 2
+        right = left + width_bar
+        bottom = np.ones(num_classes)
+        top = np.maximum(counts_split, 1)
+        verts = np.stack(
+            [
+                np.stack([left, bottom], axis=-1),
+                np.stack([left, top], axis=-1),
+                np.stack([right, top], axis=-1),
+                np.stack([right, bottom], axis=-1),
+            ],
+            axis=1,
+        )
+        ax.add_collection(
+            PolyCollection(
+                verts,
+                facecolors=colors[i % len(colors)],
+                label=None if splits is None else splits[i],
+            )
+        )
+
+    ax.set_yscale("log")
+    ax.set_xlim(-0.5, num_classes - 0.5)
+    ax.set_ylim(1, max(10, 1.5 * counts.max()))
+    ax.set_xticks(x)
+    labels = ax.set_xticklabels(cnames, rotation=45, ha="right")
+    ax.grid(axis="y", alpha=0.5)
+    ax.set_axisbelow(True)
+    ax.set(xlabel="class", ylabel="count")
+    if splits is not None:
+        ax.legend()
+
+    # margins (in inches) for the labels
+    index_longest = max(range(num_classes), key=lambda i: len(cnames[i]))
+    extent = labels[index_longest].get_window_extent(fig.canvas.get_renderer())
+    bottom = extent.height / fig.dpi + 0.6
+    fig.subplots_adjust(
+        left=1 / width,
+        right=1 - 0.2 / width,
+        bottom=min(bottom / height, 0.5),
+        top=1 - 0.2 / height,
+    )
+    fig.savefig(path)
+
+
 class StatVisualizer:
     def __init__(self, moma, dir_vis=None):
         if dir_vis is None:
@@ -14,71 +126,69 @@ class StatVisualizer:
         self.moma = moma
         self.dir_vis = dir_vis
 
-    def show(self, with_split):
-        os.makedirs(osp.join(self.dir_vis, "stats"), exist_ok=True)
+    def _get_plot_data(self, with_split):
+        """
+        Arrays to plot for each kind, read from the memory-mapped distributions in
+        Statistics
 
-        keys = [
-            x for x in self.moma.statistics["all"].keys() if x != "raw" and x != "hoi"
-        ]
-        if with_split:
-            distributions, hues = {}, {}
-            for key in keys:
-                distributions[key] = (
-                    self.moma.statistics["standard_train"][key]["distribution"]
-                    + self.moma.statistics["standard_val"][key]["distribution"]
-                    + self.moma.statistics["standard_test"][key]["distribution"]
-                )
-                hues[key] = (
-                    ["train"]
-                    * len(self.moma.statistics["standard_train"][key]["distribution"])
-                    + ["val"]
-                    * len(self.moma.statistics["standard_val"][key]["distribution"])
-                    + ["test"]
-                    * len(self.moma.statistics["standard_test"][key]["distribution"])
+        :return: ``{kind: (cnames, counts, splits)}``, where ``counts`` is (S,C)
+        """
+        statistics = self.moma.statistics
+        keys = [x for x in statistics["all"].keys() if x != "raw" and x != "hoi"]
+        splits = ["train", "val", "test"] if with_split else None
+
+        data = {}
+        for key in keys:
+            cnames = [
+                cname[0] if isinstance(cname, tuple) else cname
+                for cname in self.moma.taxonomy[key]
+            ]
+            if with_split:
+                counts = np.stack(
+                    [
+                        statistics[f"standard_{split}"][key]["distribution"]
+                        for split in splits
+                    ]
                 )
+            else:
+                counts = np.asarray(statistics["all"][key]["distribution"])[None]
+            assert counts.shape[1] == len(cnames), f"{key}: {counts.shape[1]}"
 
-        else:
-            distributions = {
-                key: self.moma.statistics["all"][key]["distribution"] for key in keys
-            }
-            hues = {key: None for key in keys}
-
-        paths = {}
-        for key in distributions:
-            counts = distributions[key]
-            cnames = (
-                self.moma.taxonomy[key] * 3 if with_split else self.moma.taxonomy[key]
-            )
-            if isinstance(cnames[0], tuple):
-                cnames = [cname[0] for cname in cnames]
-            hue = hues[key]
-            fname = f"{key}{'_split' if with_split else ''}.png"
-            color = None if with_split else "seagreen"
-            palette = "dark" if with_split else None
-            assert len(counts) == len(cnames), f"{key}: {len(counts)} vs {len(cnames)}"
-
-            sns.set(style="darkgrid")
-            width = max(20, int(0.25 * len(counts)))
-            height = int(0.5 * width)
-            fig, ax = plt.subplots(figsize=(width, height))
-            sns.barplot(
-                x=cnames,
-                y=counts,
-                hue=hue,
-                ci=None,
-                ax=ax,
-                log=True,
-                color=color,
-                palette=palette,
+            data[key] = (np.array(cnames), counts, splits)
+
+        return data
+
+    def show(self, with_split, backend="seaborn", workers=1):
+        """
+        Plot the class distribution of each kind to ``stats/<kind>[_split].png``.
+
+        :param with_split: plot the train, val and test splits side by side
+        :type with_split: bool
+        :param backend: ``seaborn``, or ``matplotlib`` which is much faster for the
+            larger taxonomies, and does not need seaborn to be installed
+        :type backend: Literal['seaborn', 'matplotlib']
+        :param workers: number of processes to plot the kinds in
+        :type workers: int
+        :return: paths to the plots of each kind
+        :rtype: dict[str, str]
+        """
+        assert backend in ["seaborn", "matplotlib"]
+        os.makedirs(osp.join(self.dir_vis, "stats"), exist_ok=True)
+
+        data = self._get_plot_data(with_split)
+        paths = {
+            key: osp.join(
+                self.dir_vis, "stats", f"{key}{'_split' if with_split else ''}.png"
             )
-            ax.set(xlabel="class", ylabel="count")
-            ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
-            ax.set_ylim(bottom=1)
-            plt.tight_layout()
-
-            path = osp.join(self.dir_vis, "stats", fname)
-            paths[key] = path
-            plt.savefig(path)
-            plt.close(fig)
+            for key in data
+        }
+        args = [(*data[key], paths[key], backend) for key in data]
+
+        if workers <= 1:
+            for x in args:
+                _plot(*x)
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                list(executor.map(_plot, *zip(*args)))
 
         return paths
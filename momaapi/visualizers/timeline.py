@@ -2,11 +2,15 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 from distinctipy import distinctipy
 import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
 import os
 import os.path as osp
 import tempfile
 
+import PIL.Image as Image
+
 from ..utils import supress_stdout
 
 
@@ -40,16 +44,94 @@ class TimelineVisualizer:
     def show(self, id_act, id_sact=None, id_hoi=None, path=None):
         os.makedirs(osp.join(self.dir_vis, "timeline"), exist_ok=True)
 
+        fig, ax, cursor = self._draw(id_act, id_sact, id_hoi)
+
+        if path is None:
+            fname = (
+                f"{id_act}"
+                + ("" if cursor["id_sact"] is None else f"{id_sact}")
+                + ("" if cursor["id_hoi"] is None else f"{id_hoi}")
+                + ".png"
+            )
+            path = osp.join(self.dir_vis, f"timeline/{fname}")
+        fig.savefig(path)
+        return path
+
+    @supress_stdout
+    def render(self, id_act, id_sact=None, id_hoi=None):
+        """
+        Like show(), but returns the timeline as an in-memory image
+        """
+        fig, ax, cursor = self._draw(id_act, id_sact, id_hoi)
+        fig.canvas.draw()
+        return self._to_image(fig)
+
+    @supress_stdout
+    def render_frames(self, id_act, id_sact=None, ids_hoi=None):
+        """
+        Render the timeline once per higher-order interaction, as render() does.
+        The static timeline is drawn once, and only the cursor is redrawn on top of
+        it for each frame.
+
+        :param id_act: activity instance ID
+        :type id_act: str
+        :param id_sact: sub-activity instance ID to highlight
+        :type id_sact: Optional[str]
+        :param ids_hoi: higher-order interaction instance IDs, one per frame
+            (default: all higher-order interactions of the activity)
+        :type ids_hoi: Optional[list[str]]
+        :return: the frames
+        :rtype: list[PIL.Image.Image]
+        """
+        return list(self.iter_frames(id_act, id_sact, ids_hoi))
+
+    def iter_frames(self, id_act, id_sact=None, ids_hoi=None):
+        """
+        Like render_frames(), but yields the frames one at a time
+        """
+        fig, ax, cursor = self._draw(id_act, id_sact, animated=True)
+        if ids_hoi is None:
+            ids_hoi = list(cursor["times_hoi"])
+
+        canvas = fig.canvas
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        for id_hoi in ids_hoi:
+            canvas.restore_region(background)
+            self._move_cursor(cursor, cursor["times_hoi"][id_hoi])
+            for artist in cursor["artists"]:
+                ax.draw_artist(artist)
+            yield self._to_image(fig)
+
+    @staticmethod
+    def _to_image(fig):
+        image = np.asarray(fig.canvas.buffer_rgba())[..., :3]
+        return Image.fromarray(image.copy())
+
+    @staticmethod
+    def _move_cursor(cursor, time):
+        line_progress, marker, text = cursor["artists"]
+        line_progress.set_xdata([cursor["interval_video"][0], time])
+        marker.set_xdata([time])
+        text.set_text(time.strftime("  %M:%S"))
+
+    def _draw(self, id_act, id_sact=None, id_hoi=None, animated=False):
+        """
+        Draw the timeline of an activity on an Agg figure. The cursor is drawn if
+        ``id_hoi`` is given. With ``animated=True``, the cursor is excluded from
+        ``fig.canvas.draw()`` so it can be drawn separately for each frame.
+
+        :return: the figure, its axes and the state of the cursor
+        """
         metadatum = self.moma.get_metadata(ids_act=[id_act])[0]
         ann_act = self.moma.get_anns_act(ids_act=[id_act])[0]
 
         ids_sact = self.moma.get_ids_sact(ids_act=[id_act])
-        index_sact = ids_sact.index(id_sact) if id_sact in ids_sact else None
         anns_sact = self.moma.get_anns_sact(ids_sact=ids_sact)
         anns_sact = sorted(anns_sact, key=lambda x: x.start)
 
         ids_hoi = self.moma.get_ids_hoi(ids_sact=ids_sact)
-        index_hoi = ids_hoi.index(id_hoi) if id_hoi in ids_hoi else None
         anns_hoi = self.moma.get_anns_hoi(ids_hoi=ids_hoi)
         anns_hoi = sorted(anns_hoi, key=lambda x: x.time)
 
@@ -63,13 +145,23 @@ class TimelineVisualizer:
         colors_sact = self._get_palette(len(ids_color))
         times_hoi = [ann_hoi.time for ann_hoi in anns_hoi]
 
+        # index into the annotations sorted by time, not into the IDs
+        index_sact, index_hoi = None, None
+        if id_sact in ids_sact:
+            index_sact = [ann_sact.id for ann_sact in anns_sact].index(id_sact)
+        if id_hoi in ids_hoi:
+            index_hoi = [ann_hoi.id for ann_hoi in anns_hoi].index(id_hoi)
+
         interval_video = [to_dt(x) for x in interval_video]
         time_act = to_dt((interval_act[0] + interval_act[1]) / 2)
         interval_act = [to_dt(x) for x in interval_act]
         intervals_sact = [[to_dt(x[0]), to_dt(x[1])] for x in intervals_sact]
         times_hoi = [to_dt(x) for x in times_hoi]
 
-        fig, ax = plt.subplots(figsize=(20, 2), constrained_layout=True)
+        # not managed by pyplot, so that nothing has to be closed
+        fig = Figure(figsize=(20, 2), constrained_layout=True)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
 
         # draw video
         ax.plot(interval_video, [0, 0], "o-", color="lightgray", markerfacecolor="w")
@@ -108,8 +200,9 @@ class TimelineVisualizer:
         ax.plot(
             times_hoi, [0] * len(times_hoi), "|", color="black", markerfacecolor="w"
         )
-        if index_hoi is not None:
-            time = times_hoi[index_hoi]
+        artists = []
+        if index_hoi is not None or animated:
+            time = interval_video[0] if index_hoi is None else times_hoi[index_hoi]
             ax.plot(
                 interval_video,
                 [-0.2, -0.2],
@@ -118,28 +211,37 @@ class TimelineVisualizer:
                 linewidth=4,
                 solid_capstyle="round",
             )
-            ax.plot(
+            artists += ax.plot(
                 [interval_video[0], time],
                 [-0.2, -0.2],
                 "-",
                 color="firebrick",
                 linewidth=4,
                 solid_capstyle="round",
+                animated=animated,
             )
-            ax.plot(time, -0.2, marker="o", color="tab:red", markersize=10)
-            ax.text(
-                interval_video[1],
+            artists += ax.plot(
+                time,
                 -0.2,
-                time.strftime("  %M:%S"),
-                color="firebrick",
-                va="center",
+                marker="o",
+                color="tab:red",
+                markersize=10,
+                animated=animated,
+            )
+            artists.append(
+                ax.text(
+                    interval_video[1],
+                    -0.2,
+                    time.strftime("  %M:%S"),
+                    color="firebrick",
+                    va="center",
+                    animated=animated,
+                )
             )
-
         locator = mdates.SecondLocator(bysecond=[0, 30])
         format = mdates.DateFormatter("%M:%S")
         ax.xaxis.set_major_locator(locator)
         ax.xaxis.set_major_formatter(format)
-        plt.setp(ax.get_xticklabels())
 
         ax.yaxis.set_visible(False)
         ax.spines[["left", "top", "right"]].set_visible(False)
@@ -153,14 +255,13 @@ class TimelineVisualizer:
         ]
         ax.legend(*zip(*unique))
 
-        if path is None:
-            fname = (
-                f"{id_act}"
-                + ("" if index_sact is None else f"{id_sact}")
-                + ("" if index_hoi is None else f"{id_hoi}")
-                + ".png"
-            )
-            path = osp.join(self.dir_vis, f"timeline/{fname}")
-        plt.savefig(path)
-        plt.close(fig)
-        return path
+        cursor = {
+            "id_sact": None if index_sact is None else id_sact,
+            "id_hoi": None if index_hoi is None else id_hoi,
+            "interval_video": interval_video,
+            "times_hoi": {
+                ann_hoi.id: time for ann_hoi, time in zip(anns_hoi, times_hoi)
+            },
+            "artists": artists,
+        }
+        return fig, ax, cursor
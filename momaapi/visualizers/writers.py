@@ -0,0 +1,168 @@
+"""
+Streaming writers for animations. Frames are consumed from an iterable and encoded
+one at a time, so only the frame being encoded is held in memory.
+"""
+
+import os
+import os.path as osp
+
+import numpy as np
+import PIL.GifImagePlugin as GifImagePlugin
+import PIL.Image as Image
+
+
+def _to_image(frame):
+    if isinstance(frame, np.ndarray):
+        return Image.fromarray(frame)
+    return frame
+
+
+def _to_array(frame):
+    if isinstance(frame, np.ndarray):
+        return frame
+    return np.asarray(frame.convert("RGB"))
+
+
+def write_frames(path, frames, duration, colors=None):
+    """
+    Write an animation, choosing the format from the extension of ``path``:
+     - ``.gif``: GIF with a palette shared by the frames that it can represent
+     - ``.mp4``: H.264, encoded with ffmpeg
+     - ``.webp``: animated WebP, encoded with ffmpeg
+
+    A partially written file is removed if encoding fails.
+
+    :param path: path to the animation
+    :type path: str
+    :param frames: RGB frames of the same size, as images or (H,W,3) uint8 arrays
+    :type frames: Iterable[Union[PIL.Image.Image, np.ndarray]]
+    :param duration: duration of each frame (ms)
+    :type duration: float
+    :param colors: RGB colors to reserve in the palette of a GIF
+    :type colors: Optional[list[tuple[int, int, int]]]
+    """
+    ext = osp.splitext(path)[1]
+    assert ext in [".gif", ".mp4", ".webp"], f"Unsupported format {ext}"
+
+    try:
+        if ext == ".gif":
+            write_gif(path, frames, duration, colors=colors)
+        elif ext == ".mp4":
+            write_video(
+                path,
+                frames,
+                duration,
+                vcodec="libx264",
+                pix_fmt="yuv420p",
+                vf="pad=ceil(iw/2)*2:ceil(ih/2)*2",  # yuv420p needs even sizes
+            )
+        else:  # .webp
+            write_video(path, frames, duration, vcodec="libwebp", loop=0)
+    except BaseException:
+        if osp.exists(path):
+            os.remove(path)
+        raise
+
+
+def write_gif(path, frames, duration, loop=0, colors=None):
+    """
+    Write a GIF frame by frame. Frames share a global palette of ``colors`` and the
+    colors of the first frame. A frame that the shared palette cannot represent,
+    such as one with colors that are not in the first frame, gets its own palette.
+
+    :param colors: RGB colors to reserve in the shared palette, such as the colors
+        of boxes and labels that may not all be in the first frame
+    :type colors: Optional[list[tuple[int, int, int]]]
+    """
+    colors = [] if colors is None else list(dict.fromkeys(map(tuple, colors)))
+    assert len(colors) < 256
+
+    frames = (_to_image(frame) for frame in frames)
+    image = next(frames)
+    size = image.size
+    image_palette = _get_palette(image.convert("RGB"), colors)
+
+    with open(path, "wb") as f:
+        info = {"loop": loop, "duration": duration, "optimize": False}
+        header, _ = GifImagePlugin.getheader(image_palette, info=info)
+        f.write(b"".join(header))
+
+        while image is not None:
+            assert image.size == size
+            image = image.convert("RGB")
+            image_quantized = image.quantize(
+                palette=image_palette, dither=Image.Dither.NONE
+            )
+            params = {"duration": duration}
+            if _is_misrepresented(image, image_quantized):
+                image_quantized = _get_palette(image, colors)
+                params["include_color_table"] = True
+            f.write(b"".join(GifImagePlugin.getdata(image_quantized, **params)))
+            image = next(frames, None)
+
+        f.write(b";")  # trailer
+
+
+def _get_palette(image, colors):
+    """
+    Quantize an image to its own colors and the reserved ``colors``
+    """
+    image_quantized = image.quantize(256 - len(colors))
+    if len(colors) == 0:
+        return image_quantized
+
+    palette = image_quantized.getpalette()[: 3 * (256 - len(colors))]
+    palette += [x for color in colors for x in color]
+    image_palette = Image.new("P", (1, 1))
+    image_palette.putpalette(palette)
+    return image.quantize(palette=image_palette, dither=Image.Dither.NONE)
+
+
+def _is_misrepresented(image, image_quantized, tolerance=48, ratio=1e-3):
+    """
+    Whether more than ``ratio`` of the pixels of a quantized image are off by more
+    than ``tolerance`` (summed over channels)
+    """
+    error = np.abs(
+        np.asarray(image, dtype=np.int16)
+        - np.asarray(image_quantized.convert("RGB"), dtype=np.int16)
+    ).sum(axis=-1)
+    return (error > tolerance).mean() > ratio
+
+
+def write_video(path, frames, duration, **kwargs):
+    """
+    Pipe raw RGB frames to ffmpeg. ``kwargs`` are ffmpeg output options.
+    """
+    import ffmpeg
+
+    frames = (_to_array(frame) for frame in frames)
+    image = next(frames)
+    height, width = image.shape[:2]
+
+    process = (
+        ffmpeg.input(
+            "pipe:",
+            format="rawvideo",
+            pix_fmt="rgb24",
+            s=f"{width}x{height}",
+            r=1000 / duration,
+        )
+        .output(path, **kwargs)
+        .global_args("-loglevel", "error")  # so stderr cannot fill its pipe
+        .overwrite_output()
+        .run_async(pipe_stdin=True, pipe_stderr=True)
+    )
+
+    try:
+        while image is not None:
+            assert image.shape == (height, width, 3)
+            process.stdin.write(image.tobytes())
+            image = next(frames, None)
+    finally:
+        process.stdin.close()
+        stderr = process.stderr.read()
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed:\n{stderr.decode()}")
@@ -105,21 +105,64 @@ class VideoProcessor:
             .setpts("PTS-STARTPTS")
 
         if resize is not None:
-            probe = ffmpeg.probe(path_src)
-            video_stream = next(
-                stream for stream in probe["streams"]
-                if stream["codec_type"] == "video"
-            )
-            width = int(video_stream["width"])
-            height = int(video_stream["height"])
-
-            if width < height:
-                trimmed = trimmed.filter("scale", resize, -2)
-            else:
-                trimmed = trimmed.filter("scale", -2, resize)
+            trimmed = self.resize_video(trimmed, path_src, resize)
 
         trimmed.output(path_trg, loglevel=self.log_level).run()
 
+    def resize_video(self, stream, path_src: str, resize: int):
+        """
+        Scale the shorter side of a video stream to ``resize``
+        """
+        probe = ffmpeg.probe(path_src)
+        video_stream = next(
+            stream for stream in probe["streams"]
+            if stream["codec_type"] == "video"
+        )
+        width = int(video_stream["width"])
+        height = int(video_stream["height"])
+
+        if width < height:
+            return stream.filter("scale", resize, -2)
+        else:
+            return stream.filter("scale", -2, resize)
+
+    def trim_video_segments(
+            self,
+            path_src: str,
+            segments: list[tuple[str, float, float]],
+            resize: Optional[int] = None,
+    ):
+        """
+        Trim several segments of a video in a single pass. The video is decoded and
+        resized once, and split into one stream per segment, instead of being
+        decoded again for every segment.
+
+        :param segments: the target path, start and end time of each segment
+        """
+        if len(segments) == 0:
+            return
+
+        # seek to the first segment and stop after the last one
+        start_min = min(start for _, start, _ in segments)
+        end_max = max(end for _, _, end in segments)
+        decoded = ffmpeg.input(path_src, ss=start_min, t=end_max - start_min).video
+
+        if resize is not None:
+            decoded = self.resize_video(decoded, path_src, resize)
+
+        split = decoded.filter_multi_output("split", len(segments))
+        outputs = []
+        for i, (path_trg, start, end) in enumerate(segments):
+            trimmed = split.stream(i) \
+                .trim(start=start - start_min, end=end - start_min) \
+                .setpts("PTS-STARTPTS")
+            outputs.append(trimmed.output(path_trg))
+
+        ffmpeg.merge_outputs(*outputs) \
+            .global_args("-loglevel", self.log_level) \
+            .overwrite_output() \
+            .run()
+
     def trim_activity(
             self,
             id: str,
@@ -149,8 +192,14 @@ class VideoProcessor:
             id: str,
             resize: Optional[int] = None,
             overwrite: bool = False,
+            single_pass: bool = False,
     ) -> list[str]:
+        """
+        :param single_pass: decode the raw video once for all sub-activities (see
+          :meth:`trim_video_segments`) instead of once per sub-activity
+        """
         paths_trg: list[str] = []
+        segments: list[tuple[str, float, float]] = []
 
         ann = self.anns[id]
         filename = assert_type(ann["file_name"], str)
@@ -159,23 +208,68 @@ class VideoProcessor:
         assert os.path.exists(path_src)
 
         sub_activities: list[dict] = assert_type(ann["activity"]["sub_activities"], list)
-        for ann_sact in tqdm(sub_activities):
+        for ann_sact in tqdm(sub_activities, disable=single_pass):
             sact_id = assert_type(ann_sact['id'], str)
             path_trg = os.path.join(self.sub_activities_dir, f"{sact_id}.mp4")
             if not os.path.exists(path_trg) or overwrite:
                 start = assert_type(ann_sact["start_time"], float)
                 end = assert_type(ann_sact["end_time"], float)
-                self.trim_video(
-                    path_src=path_src,
-                    path_trg=path_trg,
-                    start=start,
-                    end=end,
-                    resize=resize,
-                )
+                if single_pass:
+                    segments.append((path_trg, start, end))
+                else:
+                    self.trim_video(
+                        path_src=path_src,
+                        path_trg=path_trg,
+                        start=start,
+                        end=end,
+                        resize=resize,
+                    )
             paths_trg.append(path_trg)
 
+        self.trim_video_segments(path_src, segments, resize=resize)
+
         return paths_trg
 
+    def trim_activity_and_sub_activities(
+            self,
+            id: str,
+            resize: Optional[int] = None,
+            overwrite: bool = False,
+    ) -> tuple[str, list[str]]:
+        """
+        Equivalent to :meth:`trim_activity` followed by :meth:`trim_sub_activity`,
+        but the raw video is decoded only once.
+        """
+        segments: list[tuple[str, float, float]] = []
+
+        ann = self.anns[id]
+        ann_act: dict[str, Any] = assert_type(ann["activity"], dict)
+        filename = assert_type(ann["file_name"], str)
+
+        path_src = os.path.join(self.raw_dir, filename)
+        assert os.path.exists(path_src)
+
+        path_trg_act = os.path.join(self.activities_dir, filename)
+        if not os.path.exists(path_trg_act) or overwrite:
+            start = assert_type(ann_act["start_time"], float)
+            end = assert_type(ann_act["end_time"], float)
+            segments.append((path_trg_act, start, end))
+
+        paths_trg_sact: list[str] = []
+        sub_activities: list[dict] = assert_type(ann_act["sub_activities"], list)
+        for ann_sact in sub_activities:
+            sact_id = assert_type(ann_sact['id'], str)
+            path_trg = os.path.join(self.sub_activities_dir, f"{sact_id}.mp4")
+            if not os.path.exists(path_trg) or overwrite:
+                start = assert_type(ann_sact["start_time"], float)
+                end = assert_type(ann_sact["end_time"], float)
+                segments.append((path_trg, start, end))
+            paths_trg_sact.append(path_trg)
+
+        self.trim_video_segments(path_src, segments, resize=resize)
+
+        return path_trg_act, paths_trg_sact
+
     def trim_hoi(
             self,
             id: str,
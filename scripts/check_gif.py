@@ -0,0 +1,72 @@
+"""
+Check that GIFs written frame by frame keep the colors of every frame, including
+colors that are not in the first frame: frames are written, decoded again and
+compared to the originals.
+Exits with a non-zero status if the check fails.
+"""
+import os.path as osp
+import sys
+import tempfile
+
+import numpy as np
+import PIL.Image as Image
+
+from momaapi.visualizers.writers import write_gif
+
+# maximum difference of a pixel (summed over channels)
+tolerance = 48
+
+
+def make_frames(size=(64, 48)):
+    width, height = size
+    colors = [(0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0), (255, 255, 255)]
+
+    # stripes
+    stripes = np.zeros((height, width, 3), dtype=np.uint8)
+    for i, color in enumerate(colors):
+        stripes[:, i * width // len(colors) : (i + 1) * width // len(colors)] = color
+    frames = [stripes]
+
+    # solid colors that are not in the first frame
+    for color in [(255, 0, 255), (0, 255, 255), (128, 64, 0), (70, 130, 180)]:
+        frames.append(np.full((height, width, 3), color, dtype=np.uint8))
+
+    # the stripes with a box of a new color
+    frame = stripes.copy()
+    frame[10:20, 10:40] = (205, 112, 84)
+    frames.append(frame)
+
+    # a gradient
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    y = np.linspace(0, 255, height, dtype=np.uint8)
+    frame = np.stack(np.broadcast_arrays(x[None], y[:, None], 128), axis=-1)
+    frames.append(frame.astype(np.uint8))
+
+    return frames
+
+
+def main():
+    frames = make_frames()
+
+    failed = False
+    for colors in [None, [(205, 112, 84)]]:
+        with tempfile.TemporaryDirectory() as dir_tmp:
+            path = osp.join(dir_tmp, "check.gif")
+            write_gif(path, iter(frames), duration=100, colors=colors)
+
+            with Image.open(path) as image:
+                assert image.n_frames == len(frames), image.n_frames
+                for i, frame in enumerate(frames):
+                    image.seek(i)
+                    decoded = np.asarray(image.convert("RGB"), dtype=np.int16)
+                    error = np.abs(decoded - frame).sum(axis=-1).max()
+                    if error > tolerance:
+                        print(f"colors={colors}, frame {i}: off by {error}")
+                        failed = True
+
+    print("failed" if failed else f"{len(frames)} frames match")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Check that importing momaapi stays cheap: the core API must not pull in the heavy
+dependencies of the visualizers, and the import must fit in a time budget.
+Exits with a non-zero status if either check fails.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+heavy = [
+    "distinctipy",
+    "jsbeautifier",
+    "matplotlib",
+    "pandas",
+    "pygraphviz",
+    "scipy",
+    "seaborn",
+    "torch",
+    "torchvision",
+]
+
+code = f"""
+import json
+import sys
+import time
+
+t = time.perf_counter()
+import momaapi
+t = time.perf_counter() - t
+
+loaded = sorted(x for x in {heavy!r} if x in sys.modules)
+print(json.dumps({{"time": t, "loaded": loaded}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-b", "--budget", type=float, default=1.0, help="import time budget (s)"
+    )
+    args = parser.parse_args()
+
+    # run in a fresh interpreter so nothing is already imported
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output)
+
+    print(f"import momaapi: {result['time']:.3f}s (budget {args.budget:.3f}s)")
+    failed = False
+    if len(result["loaded"]) > 0:
+        print(f"heavy dependencies loaded: {', '.join(result['loaded'])}")
+        failed = True
+    if result["time"] > args.budget:
+        print("import time budget exceeded")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Check that graph layouts cached by AnnVisualizer can be reused: the same HOI is
+rendered twice into a fresh layout cache, so the second render loads its layout
+from the cache, and both renders must be identical.
+Exits with a non-zero status if the check fails.
+"""
+import argparse
+import os.path as osp
+import sys
+import tempfile
+
+import numpy as np
+import PIL.Image as Image
+
+from momaapi import MOMA, AnnVisualizer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--dir-moma", type=str, default=".data")
+    parser.add_argument("--id-hoi", type=str, default=None, help="default: the first")
+    args = parser.parse_args()
+
+    moma = MOMA(args.dir_moma)
+    id_hoi = args.id_hoi if args.id_hoi is not None else moma.get_ids_hoi()[0]
+
+    images = []
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        dir_layout = osp.join(dir_tmp, "layout")
+        for i in range(2):
+            # only the layout cache is shared, so the HOI is rendered again
+            visualizer = AnnVisualizer(moma, osp.join(dir_tmp, str(i)), dir_layout)
+            path = visualizer.show_hoi(id_hoi)
+            images.append(np.asarray(Image.open(path).convert("RGB")))
+
+    if images[0].shape != images[1].shape or (images[0] != images[1]).any():
+        print(f"HOI {id_hoi}: the render with a cached layout differs")
+        sys.exit(1)
+
+    print(f"HOI {id_hoi}: rendered twice from the layout cache")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Check that the number of classes can be read from a freshly built MOMA object, in
+both paradigms, before anything has loaded the lazy parts of the taxonomy.
+Exits with a non-zero status if the check fails.
+"""
+import argparse
+import sys
+
+from momaapi import MOMA
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--dir-moma", type=str, default=".data")
+    args = parser.parse_args()
+
+    failed = False
+    for paradigm in ["standard", "few-shot"]:
+        moma = MOMA(args.dir_moma, paradigm=paradigm)
+        try:
+            num_classes = moma.num_classes
+        except Exception as e:
+            print(f"{paradigm}: {type(e).__name__}: {e}")
+            failed = True
+        else:
+            print(f"{paradigm}: {num_classes}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+Build a static HTML gallery of the visualizations in <dir-vis> at
+<dir-vis>/gallery/index.html, which can be opened straight from disk.
+
+ - Thumbnails are packed into sprite sheets of one page each, so a page of the
+   gallery is a single image request. Sheets are only rebuilt when their sources
+   change.
+ - Items and their classes are written to a compact search index per kind
+   (index_<kind>.js), loaded the first time the kind is browsed. Filtering and
+   pagination happen in the browser, and only the current page is in the DOM.
+ - Full-size renders (<dir-vis>/sact, <dir-vis>/hoi, <dir-vis>/overlay) are only
+   loaded when an item is opened. Items without a render fall back to the
+   interaction images of the dataset.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import os.path as osp
+import time
+
+import PIL.Image as Image
+
+from momaapi import MOMA
+
+size_thumbnail = (192, 108)
+num_cols = 10
+size_page = 100  # thumbnails per sprite sheet and per page of the gallery
+
+
+def build_sprite(path_sprite, paths_src):
+    """
+    Pack the thumbnails of a page into one sprite sheet, row by row. Thumbnails
+    that cannot be read are left blank.
+
+    :return: paths of the thumbnails that could not be read
+    """
+    width, height = size_thumbnail
+    num_rows = (len(paths_src) + num_cols - 1) // num_cols
+    sprite = Image.new("RGB", (width * num_cols, height * num_rows), (34, 34, 34))
+
+    failed = []
+    for i, path_src in enumerate(paths_src):
+        if path_src is None:
+            continue
+        try:
+            with Image.open(path_src) as image:
+                image.draft("RGB", size_thumbnail)  # decode JPEGs at a reduced scale
+                image = image.convert("RGB")
+                image.thumbnail(size_thumbnail, Image.BILINEAR)
+        except (OSError, SyntaxError, ValueError) as e:
+            failed.append(path_src)
+            print(f"Skipping thumbnail {path_src}: {e}")
+            continue
+        x = i % num_cols * width + (width - image.width) // 2
+        y = i // num_cols * height + (height - image.height) // 2
+        sprite.paste(image, (x, y))
+
+    path_tmp = f"{path_sprite}.tmp"
+    sprite.save(path_tmp, format="JPEG", quality=80, optimize=True)
+    os.replace(path_tmp, path_sprite)
+    return failed
+
+
+def get_digest(paths_src):
+    content = []
+    for path in paths_src:
+        if path is not None:
+            stat = os.stat(path)
+            path = [path, stat.st_size, stat.st_mtime_ns]
+        content.append(path)
+    content = json.dumps([size_thumbnail, num_cols, content])
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def find_render(dir_render, id, exts):
+    for ext in exts:
+        path = osp.join(dir_render, f"{id}.{ext}")
+        if osp.isfile(path):
+            return path
+    return None
+
+
+def get_items(moma, dir_vis):
+    """
+    List the activities, sub-activities and HOIs with their classes, thumbnails and
+    full-size renders, grouped by activity so that each page of the unfiltered
+    gallery is contiguous.
+    """
+    dir_sact = osp.join(dir_vis, "sact")
+    dir_hoi = osp.join(dir_vis, "hoi")
+    dir_overlay = osp.join(dir_vis, "overlay")
+
+    items = {"act": [], "sact": [], "hoi": []}
+    ids_act = moma.get_ids_act()
+    for ann_act in moma.get_anns_act(ids_act=ids_act):
+        anns_sact = moma.get_anns_sact(ids_sact=ann_act.ids_sact)
+        thumbnail_act = None
+
+        for ann_sact in anns_sact:
+            anns_hoi = moma.get_anns_hoi(ids_hoi=ann_sact.ids_hoi)
+            anns_hoi = sorted(anns_hoi, key=lambda x: x.time)
+            paths_image = moma.get_paths(
+                ids_hoi=[ann_hoi.id for ann_hoi in anns_hoi], sanity_check=False
+            )
+            paths_image = [x if osp.isfile(x) else None for x in paths_image]
+
+            for ann_hoi, path_image in zip(anns_hoi, paths_image):
+                render = find_render(dir_hoi, ann_hoi.id, ["png"]) or path_image
+                items["hoi"].append(
+                    {
+                        "id": ann_hoi.id,
+                        "parent": ann_sact.id,
+                        "cid_act": ann_act.cid,
+                        "cid_sact": ann_sact.cid,
+                        "cids_actor": sorted({x.cid for x in ann_hoi.actors}),
+                        "cids_object": sorted({x.cid for x in ann_hoi.objects}),
+                        "thumbnail": render,
+                        "render": render,
+                    }
+                )
+
+            render = find_render(dir_sact, ann_sact.id, ["gif", "webp", "mp4"])
+            thumbnail = next((x for x in paths_image if x is not None), None)
+            if render is not None and not render.endswith(".mp4"):
+                thumbnail = render  # the first frame
+            items["sact"].append(
+                {
+                    "id": ann_sact.id,
+                    "parent": ann_act.id,
+                    "cid_act": ann_act.cid,
+                    "cid_sact": ann_sact.cid,
+                    "thumbnail": thumbnail,
+                    "render": render,
+                }
+            )
+            thumbnail_act = thumbnail_act or thumbnail
+
+        items["act"].append(
+            {
+                "id": ann_act.id,
+                "parent": None,
+                "cid_act": ann_act.cid,
+                "cid_sact": -1,
+                "thumbnail": thumbnail_act,
+                "render": find_render(dir_overlay, ann_act.id, ["mp4", "webp", "gif"]),
+            }
+        )
+
+    return items
+
+
+def make_index(kind, items, dir_gallery):
+    """
+    A columnar index, which is much smaller than a list of objects
+    """
+    index = {
+        "kind": kind,
+        "size_page": size_page,
+        "num_cols": num_cols,
+        "size_thumbnail": size_thumbnail,
+        "ids": [item["id"] for item in items],
+        "parents": [item["parent"] for item in items],
+        "cids_act": [item["cid_act"] for item in items],
+        "cids_sact": [item["cid_sact"] for item in items],
+    }
+
+    # renders are <dir>/<id>.<ext>, so only the index of "<dir>/{id}.<ext>" is stored
+    formats, renders = [], []
+    for item in items:
+        if item["render"] is None:
+            renders.append(-1)
+            continue
+        fname = osp.basename(item["render"])
+        assert fname.startswith(f"{item['id']}."), item["render"]
+        format = osp.join(
+            osp.relpath(osp.dirname(item["render"]), dir_gallery),
+            "{id}" + fname[len(item["id"]) :],
+        )
+        if format not in formats:
+            formats.append(format)
+        renders.append(formats.index(format))
+    index["formats_render"] = formats
+    index["renders"] = renders
+
+    if kind == "hoi":
+        index["cids_actor"] = [item["cids_actor"] for item in items]
+        index["cids_object"] = [item["cids_object"] for item in items]
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--dir-moma", type=str, default="/media/hdd/moma-lrg")
+    parser.add_argument("-o", "--dir-vis", type=str, default="/media/hdd/moma-lrg/vis")
+    parser.add_argument("-n", "--num-cpus", type=int, default=8)
+    args = parser.parse_args()
+
+    dir_gallery = osp.join(args.dir_vis, "gallery")
+    dir_sprites = osp.join(dir_gallery, "sprites")
+    path_digests = osp.join(dir_gallery, "sprites.json")
+    os.makedirs(dir_sprites, exist_ok=True)
+
+    ts = time.time()
+    moma = MOMA(args.dir_moma)
+    items = get_items(moma, args.dir_vis)
+    print(
+        f"Indexed {len(items['act'])} activities, {len(items['sact'])} "
+        f"sub-activities and {len(items['hoi'])} HOIs ({time.time() - ts:.1f} sec)"
+    )
+
+    # search index
+    for kind, items_kind in items.items():
+        index = make_index(kind, items_kind, dir_gallery)
+        with open(osp.join(dir_gallery, f"index_{kind}.js"), "w") as f:
+            # a script rather than JSON, since browsers do not fetch local files
+            f.write(f"gallery.load({json.dumps(index, separators=(',', ':'))});\n")
+
+    # sprite sheets, rebuilt if their sources have changed
+    digests = {}
+    if osp.isfile(path_digests):
+        with open(path_digests, "r") as f:
+            digests = json.load(f)
+
+    jobs = []
+    for kind, items_kind in items.items():
+        for page in range((len(items_kind) + size_page - 1) // size_page):
+            items_page = items_kind[page * size_page : (page + 1) * size_page]
+            paths_src = [item["thumbnail"] for item in items_page]
+            fname = f"{kind}_{page}.jpg"
+            digest = get_digest(paths_src)
+            if digests.get(fname) != digest or not osp.isfile(
+                osp.join(dir_sprites, fname)
+            ):
+                jobs.append((fname, paths_src, digest))
+            else:
+                digests[fname] = digest
+
+    print(f"Building {len(jobs)} sprite sheets")
+    ts = time.time()
+    with ProcessPoolExecutor(args.num_cpus) as executor:
+        futures = {
+            fname: executor.submit(
+                build_sprite, osp.join(dir_sprites, fname), paths_src
+            )
+            for fname, paths_src, _ in jobs
+        }
+        for i, (fname, paths_src, digest) in enumerate(jobs, start=1):
+            # a sheet that is incomplete is not recorded, so it is built again
+            try:
+                failed = futures[fname].result()
+            except Exception as e:
+                failed = True
+                print(f"Failed to build {fname}: {e}")
+            if failed:
+                digests.pop(fname, None)
+            else:
+                digests[fname] = digest
+            if i % 100 == 0 or i == len(jobs):
+                print(f"[{i}/{len(jobs)}] {time.time() - ts:.1f} sec")
+
+    with open(path_digests, "w") as f:
+        json.dump(digests, f, indent=2, sort_keys=True)
+
+    # page
+    config = {
+        "counts": {kind: len(items_kind) for kind, items_kind in items.items()},
+        "cnames_act": moma.taxonomy["act"],
+        "cnames_sact": moma.taxonomy["sact"],
+        "cnames_actor": moma.taxonomy["actor"],
+        "cnames_object": moma.taxonomy["object"],
+    }
+    with open(osp.join(dir_gallery, "index.html"), "w") as f:
+        f.write(template.replace("/* config */", json.dumps(config)))
+
+    print(f"Saved {osp.join(dir_gallery, 'index.html')}")
+
+
+template = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>MOMA-LRG gallery</title>
+<style>
+  body { margin: 0; font: 14px sans-serif; background: #111; color: #ddd; }
+  header { position: sticky; top: 0; padding: 8px; background: #222; z-index: 1; }
+  header button.active { font-weight: bold; }
+  header select { max-width: 14em; }
+  #grid { display: grid; grid-template-columns: repeat(auto-fill, 192px);
+          gap: 6px; padding: 8px; justify-content: center; }
+  .item { width: 192px; cursor: pointer; }
+  .thumbnail { width: 192px; height: 108px; background-color: #222; }
+  .caption { overflow: hidden; white-space: nowrap; text-overflow: ellipsis;
+             font-size: 12px; }
+  #viewer { display: none; position: fixed; inset: 0; padding: 2em;
+            background: rgba(0, 0, 0, 0.9); text-align: center; z-index: 2; }
+  #viewer img, #viewer video { max-width: 100%; max-height: 85vh; }
+</style>
+</head>
+<body>
+<header>
+  <span id="tabs"></span>
+  <select id="act"></select>
+  <select id="sact"></select>
+  <select id="actor"></select>
+  <select id="object"></select>
+  <input id="query" placeholder="ID" size="10">
+  <button id="prev">&lt;</button>
+  <span id="page"></span>
+  <button id="next">&gt;</button>
+</header>
+<div id="grid"></div>
+<div id="viewer"></div>
+<script>
+"use strict";
+const config = /* config */;
+const names = {act: "Activities", sact: "Sub-activities", hoi: "HOIs"};
+const labels = {act: "activity", sact: "sub-activity", actor: "actor", object: "object"};
+const $ = (id) => document.getElementById(id);
+
+const gallery = {
+  indices: {},
+  kind: null,
+  page: 0,
+  matches: [],
+  filters: {act: -1, sact: -1, actor: -1, object: -1, parent: null, query: ""},
+
+  // called by index_<kind>.js
+  load(index) {
+    this.indices[index.kind] = index;
+    if (index.kind === this.kind) this.filter();
+  },
+
+  show(kind, parent = null) {
+    this.kind = kind;
+    this.filters.parent = parent;
+    if (parent !== null) {  // only filter by the parent
+      for (const key of Object.keys(labels)) {
+        this.filters[key] = -1;
+        $(key).value = "-1";
+      }
+      this.filters.query = $("query").value = "";
+    }
+    for (const button of $("tabs").children)
+      button.classList.toggle("active", button.dataset.kind === kind);
+    $("actor").hidden = $("object").hidden = kind !== "hoi";
+    $("sact").hidden = kind === "act";
+    if (kind in this.indices) {
+      this.filter();
+    } else {  // load the index on first use
+      const script = document.createElement("script");
+      script.src = "index_" + kind + ".js";
+      document.body.appendChild(script);
+    }
+  },
+
+  filter() {
+    const index = this.indices[this.kind];
+    if (index === undefined) return;  // filtered once loaded
+    const f = this.filters;
+    const matches = [];
+    for (let i = 0; i < index.ids.length; i++) {
+      if (f.act >= 0 && index.cids_act[i] !== f.act) continue;
+      if (f.sact >= 0 && index.cids_sact[i] !== f.sact) continue;
+      if (f.parent !== null && index.parents[i] !== f.parent) continue;
+      if (f.query && !index.ids[i].includes(f.query)) continue;
+      if (this.kind === "hoi") {
+        if (f.actor >= 0 && !index.cids_actor[i].includes(f.actor)) continue;
+        if (f.object >= 0 && !index.cids_object[i].includes(f.object)) continue;
+      }
+      matches.push(i);
+    }
+    this.matches = matches;
+    this.page = 0;
+    this.render();
+  },
+
+  render() {
+    const index = this.indices[this.kind];
+    if (index === undefined) return;
+    const [width, height] = index.size_thumbnail;
+    const numPages = Math.max(1, Math.ceil(this.matches.length / index.size_page));
+    $("page").textContent = (this.page + 1) + " / " + numPages
+      + " (" + this.matches.length + ")";
+
+    const grid = $("grid");
+    grid.replaceChildren();
+    const start = this.page * index.size_page;
+    for (const i of this.matches.slice(start, start + index.size_page)) {
+      const slot = i % index.size_page;
+      const item = document.createElement("div");
+      item.className = "item";
+      const thumbnail = document.createElement("div");
+      thumbnail.className = "thumbnail";
+      thumbnail.dataset.sprite = "sprites/" + this.kind + "_"
+        + Math.floor(i / index.size_page) + ".jpg";
+      thumbnail.style.backgroundPosition = (-(slot % index.num_cols) * width) + "px "
+        + (-Math.floor(slot / index.num_cols) * height) + "px";
+      const caption = document.createElement("div");
+      caption.className = "caption";
+      const cname = this.kind === "act"
+        ? config.cnames_act[index.cids_act[i]]
+        : config.cnames_sact[index.cids_sact[i]];
+      caption.textContent = index.ids[i] + " " + cname;
+      caption.title = caption.textContent;
+      item.append(thumbnail, caption);
+      item.onclick = () => this.open(i);
+      grid.appendChild(item);
+      observer.observe(thumbnail);
+    }
+    window.scrollTo(0, 0);
+  },
+
+  open(i) {
+    const index = this.indices[this.kind];
+    const viewer = $("viewer");
+    viewer.replaceChildren();
+    if (index.renders[i] >= 0) {  // only loaded now
+      const format = index.formats_render[index.renders[i]];
+      const render = format.replace("{id}", index.ids[i]);
+      const media = document.createElement(render.endsWith(".mp4") ? "video" : "img");
+      media.src = render;
+      if (media.tagName === "VIDEO") {
+        media.controls = media.autoplay = media.loop = true;
+      }
+      viewer.appendChild(media);
+    }
+    const title = document.createElement("p");
+    title.textContent = (labels[this.kind] || "HOI") + " " + index.ids[i];
+    viewer.appendChild(title);
+    const child = {act: "sact", sact: "hoi"}[this.kind];
+    if (child !== undefined) {
+      const button = document.createElement("button");
+      button.textContent = names[child];
+      button.onclick = (event) => {
+        event.stopPropagation();
+        this.close();
+        this.show(child, index.ids[i]);
+      };
+      viewer.appendChild(button);
+    }
+    viewer.style.display = "block";
+  },
+
+  close() {
+    $("viewer").style.display = "none";
+    $("viewer").replaceChildren();  // stops videos
+  },
+};
+
+// load a sprite sheet only once one of its thumbnails is on screen
+const observer = new IntersectionObserver((entries) => {
+  for (const entry of entries) {
+    if (entry.isIntersecting) {
+      entry.target.style.backgroundImage = "url(" + entry.target.dataset.sprite + ")";
+      observer.unobserve(entry.target);
+    }
+  }
+}, {rootMargin: "200px"});
+
+for (const kind of ["act", "sact", "hoi"]) {
+  const button = document.createElement("button");
+  button.dataset.kind = kind;
+  button.textContent = names[kind] + " (" + config.counts[kind] + ")";
+  button.onclick = () => gallery.show(kind);
+  $("tabs").appendChild(button);
+}
+for (const [key, label] of Object.entries(labels)) {
+  const select = $(key);
+  select.add(new Option("any " + label, -1));
+  config["cnames_" + key].forEach((cname, cid) => select.add(new Option(cname, cid)));
+  select.onchange = () => {
+    gallery.filters[key] = Number(select.value);
+    gallery.filter();
+  };
+}
+$("query").oninput = () => {
+  gallery.filters.query = $("query").value;
+  gallery.filter();
+};
+$("prev").onclick = () => {
+  if (gallery.page > 0) { gallery.page--; gallery.render(); }
+};
+$("next").onclick = () => {
+  const index = gallery.indices[gallery.kind];
+  if (index === undefined) return;
+  if ((gallery.page + 1) * index.size_page < gallery.matches.length) {
+    gallery.page++;
+    gallery.render();
+  }
+};
+$("viewer").onclick = () => gallery.close();
+document.onkeydown = (event) => {
+  if (event.key === "Escape") gallery.close();
+};
+gallery.show("sact");
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    main()
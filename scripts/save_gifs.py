@@ -1,11 +1,152 @@
+"""
+Save an animation of every sub-activity to <dir-vis>/sact/<id_sact>.<format>.
+
+Each worker process renders into its own temporary directory and atomically moves
+finished animations into place, so a crash never leaves a partial file behind.
+Completed and failed items are appended to <dir-vis>/sact/manifest.jsonl, and
+reruns skip the completed ones, or only those that are up to date with their
+annotations with --stale. Tracebacks of failed items are appended to
+<dir-vis>/sact/failures.log. If a worker process dies or hangs, the items in
+flight are recorded as failed, and the rest are rendered in a new pool.
+"""
 import argparse
-from multiprocessing import Pool
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import json
+import multiprocessing
+import os
+import os.path as osp
+import queue
+import shutil
+import signal
+import sys
+import time
+import traceback
 
 from momaapi import MOMA, AnnVisualizer
 
 
-def save_gif(id_sact):
-    visualizer.show_sact(id_sact, vstack=False)
+def init_worker(dir_moma, dir_tmp, dir_layout, queue_pids):
+    global visualizer
+    queue_pids.put(os.getpid())
+    dir_worker = osp.join(dir_tmp, f"worker_{os.getpid()}")
+    visualizer = AnnVisualizer(MOMA(dir_moma), dir_worker, dir_layout)
+
+
+def on_timeout(signum, frame):
+    raise TimeoutError
+
+
+def save_gif(id_sact, dir_sact, timeout, format):
+    """
+    Render a GIF in the worker's temporary directory and move it into place.
+
+    :return: the sub-activity ID, the render time, and the traceback of the error
+        if the item failed
+    """
+    ts = time.time()
+    signal.signal(signal.SIGALRM, on_timeout)
+    signal.alarm(timeout)
+    try:
+        path_tmp = visualizer.show_sact(id_sact, vstack=False, format=format)
+        path = osp.join(dir_sact, f"{id_sact}.{format}")
+        os.replace(f"{path_tmp}.sha1", f"{path}.sha1")
+        os.replace(path_tmp, path)
+        error = None
+    except TimeoutError:
+        error = f"Timed out after {timeout} sec\n"
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        signal.alarm(0)
+
+    return id_sact, time.time() - ts, error
+
+
+def run_pool(ids_sact, args, dir_sact, dir_tmp, dir_layout, record):
+    """
+    Render sub-activities in a pool of workers. A worker that dies (a segfault or
+    the OOM killer) breaks the whole pool, and so do the workers killed when an
+    item hangs in C code that the alarm cannot interrupt. So only one item per
+    worker is in flight at a time: on a break, those items are recorded as failed,
+    and the items not yet submitted are returned to be rendered in a new pool.
+
+    :return: the sub-activities that have not been rendered
+    """
+    ids_sact = list(reversed(ids_sact))
+    future_to_item = {}
+    error_broken = "A worker process died or hung while rendering\n"
+
+    # workers report their PIDs, so that they can be killed if an item hangs
+    queue_pids = multiprocessing.Queue()
+    pids = set()
+
+    with ProcessPoolExecutor(
+        args.num_cpus,
+        initializer=init_worker,
+        initargs=(args.dir_moma, dir_tmp, dir_layout, queue_pids),
+    ) as executor:
+        while len(ids_sact) > 0 or len(future_to_item) > 0:
+            while len(ids_sact) > 0 and len(future_to_item) < args.num_cpus:
+                id_sact = ids_sact.pop()
+                future = executor.submit(
+                    save_gif, id_sact, dir_sact, args.timeout, args.format
+                )
+                future_to_item[future] = (id_sact, time.time())
+
+            futures_done, _ = wait(
+                future_to_item, timeout=10, return_when=FIRST_COMPLETED
+            )
+            if len(futures_done) == 0 and any(
+                time.time() - ts > args.timeout + 60
+                for _, ts in future_to_item.values()
+            ):  # hung in spite of the alarm, so break the pool on purpose
+                try:
+                    while True:
+                        pids.add(queue_pids.get_nowait())
+                except queue.Empty:
+                    pass
+                for pid in pids:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:  # already dead
+                        pass
+                continue
+
+            is_broken = False
+            for future in futures_done:
+                id_sact, ts = future_to_item.pop(future)
+                try:
+                    record(*future.result())
+                except BrokenProcessPool:
+                    record(id_sact, time.time() - ts, error_broken)
+                    is_broken = True
+
+            if is_broken:  # the other items in flight are lost with the pool
+                for id_sact, ts in future_to_item.values():
+                    record(id_sact, time.time() - ts, error_broken)
+                break
+
+    queue_pids.close()
+    return list(reversed(ids_sact))
+
+
+def read_manifest(path_manifest):
+    id_sact_to_status = {}
+    if osp.isfile(path_manifest):
+        with open(path_manifest, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:  # truncated by a crash
+                    continue
+                id_sact_to_status[entry["id_sact"]] = entry["status"]
+    return id_sact_to_status
+
+
+def format_time(sec):
+    sec = int(sec)
+    return f"{sec // 3600}:{sec // 60 % 60:02d}:{sec % 60:02d}"
 
 
 def main():
@@ -13,16 +154,102 @@ def main():
     parser.add_argument("-i", "--dir-moma", type=str, default="/media/hdd/moma-lrg")
     parser.add_argument("-o", "--dir-vis", type=str, default="/media/hdd/moma-lrg/vis")
     parser.add_argument("-n", "--num-cpus", type=int, default=8)
+    parser.add_argument(
+        "-f", "--format", type=str, default="gif", choices=["gif", "mp4", "webp"]
+    )
+    parser.add_argument(
+        "-t", "--timeout", type=int, default=600, help="per-item timeout (sec)"
+    )
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help="also re-render completed items whose annotations have changed",
+    )
+    parser.add_argument(
+        "--skip-failed",
+        action="store_true",
+        help="do not retry items that failed in a previous run",
+    )
     args = parser.parse_args()
 
-    moma = MOMA(args.dir_moma)
+    dir_sact = osp.join(args.dir_vis, "sact")
+    dir_tmp = osp.join(args.dir_vis, "tmp")  # same filesystem, so moves are atomic
+    dir_layout = osp.join(args.dir_vis, "layout")  # shared by the workers
+    path_manifest = osp.join(dir_sact, "manifest.jsonl")
+    path_failures = osp.join(dir_sact, "failures.log")
+    os.makedirs(dir_sact, exist_ok=True)
+    if osp.exists(dir_tmp):  # left behind by a crash
+        shutil.rmtree(dir_tmp)
 
-    global visualizer
-    visualizer = AnnVisualizer(moma, args.dir_vis)
+    moma = MOMA(args.dir_moma)
     ids_sact = moma.get_ids_sact()
 
-    with Pool(args.num_cpus) as p:
-        p.map(save_gif, ids_sact)
+    # resume
+    id_sact_to_status = read_manifest(path_manifest)
+    ids_sact_stale = []
+    if args.stale:
+        visualizer = AnnVisualizer(moma, args.dir_vis, dir_layout)
+        ids_sact_stale = visualizer.get_stale(
+            ids_sact=ids_sact, vstack=False, format=args.format
+        )
+    ids_sact_stale = set(ids_sact_stale)
+
+    def is_pending(id_sact):
+        status = id_sact_to_status.get(id_sact)
+        if status == "done":  # unless the file has since been deleted
+            return id_sact in ids_sact_stale or not osp.isfile(
+                osp.join(dir_sact, f"{id_sact}.{args.format}")
+            )
+        elif status == "failed":
+            return not args.skip_failed
+        return True
+
+    ids_sact_pending = [id_sact for id_sact in ids_sact if is_pending(id_sact)]
+    num_skipped = len(ids_sact) - len(ids_sact_pending)
+    ids_sact = ids_sact_pending
+    print(f"Rendering {len(ids_sact)} sub-activities, skipping {num_skipped}")
+
+    num_done, num_failed = 0, 0
+    ts = time.time()
+    with open(path_manifest, "a") as f_manifest, open(
+        path_failures, "a"
+    ) as f_failures:
+
+        def record(id_sact, duration, error):
+            nonlocal num_done, num_failed
+            status = "failed" if error is not None else "done"
+            f_manifest.write(
+                json.dumps({"id_sact": id_sact, "status": status, "time": duration})
+                + "\n"
+            )
+            f_manifest.flush()
+
+            if error is not None:
+                num_failed += 1
+                f_failures.write(f"[{time.ctime()}] {id_sact}\n{error}\n")
+                f_failures.flush()
+            else:
+                num_done += 1
+
+            i = num_done + num_failed
+            elapsed = time.time() - ts
+            eta = elapsed / i * (len(ids_sact) - i)
+            print(
+                f"[{i}/{len(ids_sact)}] {id_sact} {status} ({duration:.1f} sec), "
+                f"elapsed {format_time(elapsed)}, ETA {format_time(eta)}"
+            )
+
+        ids_sact_queued = list(ids_sact)
+        while len(ids_sact_queued) > 0:
+            ids_sact_queued = run_pool(
+                ids_sact_queued, args, dir_sact, dir_tmp, dir_layout, record
+            )
+
+    shutil.rmtree(dir_tmp, ignore_errors=True)
+    print(f"{num_done} done, {num_failed} failed")
+    if num_failed > 0:
+        print(f"See {path_failures}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":